@@ -0,0 +1,89 @@
+"""
+脚本启动延迟测试：对比subprocess冷启动与预热解释器(WarmPool)fork启动，
+从发起运行到脚本输出第一行、到进程退出的耗时。
+
+测试脚本导入--preload中的模块后输出一行并退出，预热模式下这些模块已由模板进程导入。
+
+用法: python benchmarks/bench_warm_start.py [--runs 20] [--preload json,email.parser,http.client]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.warm_pool import WarmPool
+
+
+def write_script(temp_dir, preload):
+    script = os.path.join(temp_dir, "bench_script.py")
+    with open(script, "w", encoding="utf-8") as f:
+        for name in preload:
+            f.write(f"import {name}\n")
+        f.write("import sys\nprint('ready', len(sys.argv))\n")
+    return script
+
+
+def measure(start_process):
+    start = time.perf_counter()
+    process = start_process()
+    process.stdout.readline()
+    first_line = time.perf_counter() - start
+    process.stdout.read()
+    process.stderr.read()
+    process.wait()
+    process.stdout.close()
+    process.stderr.close()
+    return first_line, time.perf_counter() - start
+
+
+def run_cold(script, runs):
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    return [measure(lambda: subprocess.Popen(
+        [sys.executable, script, "--page=1"], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        text=True, encoding="utf-8", env=env, cwd=os.path.dirname(script)))
+        for _ in range(runs)]
+
+
+def run_warm(script, runs, preload):
+    pool = WarmPool(preload).start()
+    env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+    spawn = lambda: pool.spawn([script, "--page=1"], env=env, cwd=os.path.dirname(script))
+    try:
+        # 第一次运行包含模板进程的启动和预加载，不计入结果
+        measure(spawn)
+        return [measure(spawn) for _ in range(runs)]
+    finally:
+        pool.stop()
+
+
+def report(label, results):
+    first = [r[0] * 1000 for r in results]
+    total = [r[1] * 1000 for r in results]
+    print(f"{label}: 首行输出 中位数 {statistics.median(first):.1f}ms, "
+          f"进程退出 中位数 {statistics.median(total):.1f}ms, 最大 {max(total):.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--preload", default="json,email.parser,http.client,urllib.request,sqlite3",
+                        help="脚本导入并由预热解释器预加载的模块，逗号分隔")
+    args = parser.parse_args()
+    preload = [name for name in args.preload.split(",") if name]
+
+    if not WarmPool.supported():
+        print("当前平台不支持预热解释器")
+        return
+    with tempfile.TemporaryDirectory() as temp_dir:
+        script = write_script(temp_dir, preload)
+        report("subprocess冷启动", run_cold(script, args.runs))
+        report("预热解释器fork", run_warm(script, args.runs, preload))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,82 @@
+import itertools
 import threading
 import time
 import logging
+import warnings
 from abc import ABC, abstractmethod
+from core.event_bus import EVENT_BUS, CRAWLER_STATUS
 
-class BaseCrawler(ABC, threading.Thread):
+class LogLines(list):
+    """
+    logs属性返回的日志行快照
+    
+    兼容把self.logs当作列表使用的旧爬虫：append/extend写入logger，
+    clear清空内存日志缓冲区。
+    """
+    def __init__(self, crawler, lines):
+        super().__init__(lines)
+        self._crawler = crawler
+    
+    def append(self, message):
+        super().append(message)
+        self._crawler.add_log(message)
+    
+    def extend(self, messages):
+        for message in messages:
+            self.append(message)
+    
+    def __iadd__(self, messages):
+        self.extend(messages)
+        return self
+    
+    def clear(self):
+        super().clear()
+        buffer = self._crawler.log_buffer
+        if buffer is not None:
+            buffer.clear()
+
+class BaseCrawler(ABC):
+    """爬虫定义。实例只保存任务配置和最近一次运行的状态，
+    每次执行由CrawlerRun负责，因此同一实例可以反复运行"""
     def __init__(self, task_name, params=None):
-        threading.Thread.__init__(self)
         self.task_name = task_name
         self.params = params or {}
         self.status = "未运行"
         self.last_run_time = None
         self.error_info = None
+        # 子进程类爬虫的退出码和进程号，进程内爬虫为None
+        self.exit_code = None
+        self.pid = None
+        # 最近一次运行的资源统计，子进程类爬虫运行中时resource_tracker实时采样
+        self.resources = None
+        self.resource_tracker = None
         self.running = False
         self.logger = logging.getLogger(task_name)
-        self.logs = []
+        self.current_run = None
+    
+    @property
+    def status(self):
+        # 子类未调用BaseCrawler.__init__时按未运行处理
+        return getattr(self, "_status", "未运行")
+    
+    @status.setter
+    def status(self, value):
+        """状态变化时发布CRAWLER_STATUS事件，界面和控制接口据此只更新变化的任务"""
+        old_status = getattr(self, "_status", None)
+        self._status = value
+        # 初始化时的赋值不发布
+        if old_status is not None and value != old_status:
+            EVENT_BUS.publish(CRAWLER_STATUS, task_name=getattr(self, "task_name", None), status=value, old_status=old_status)
         
     def run(self):
-        self.status = "运行中"
+        # 先更新运行时间，订阅者收到状态事件时读取到的是本次运行的时间
         self.last_run_time = time.strftime("%Y-%m-%d %H:%M:%S")
+        self.status = "运行中"
         self.running = True
-        self.logs.clear()
         self.error_info = None
+        self.exit_code = None
+        self.pid = None
+        self.resources = None
         
         try:
             self.logger.info(f"开始运行爬虫: {self.task_name}")
@@ -36,6 +92,12 @@ class BaseCrawler(ABC, threading.Thread):
         finally:
             self.running = False
     
+    def start(self):
+        """兼容旧的线程接口：在新线程中执行一次运行，返回对应的CrawlerRun"""
+        crawler_run = CrawlerRun(self, self.params)
+        threading.Thread(target=crawler_run.execute, name=f"crawler-{self.task_name}", daemon=True).start()
+        return crawler_run
+    
     @abstractmethod
     def crawl(self):
         pass
@@ -45,8 +107,118 @@ class BaseCrawler(ABC, threading.Thread):
         self.status = "未运行"
         self.logger.info(f"爬虫已停止: {self.task_name}")
     
-    def get_logs(self):
-        return self.logs
+    def get_resource_usage(self):
+        """运行中返回实时采样的资源占用，否则返回最近一次运行的统计"""
+        tracker = self.resource_tracker
+        if tracker is not None:
+            return tracker.get_stats()
+        return self.resources
+    
+    @property
+    def log_buffer(self):
+        """logger上挂载的内存日志缓冲区（RingBufferHandler），没有时为None"""
+        for handler in self.logger.handlers:
+            if hasattr(handler, "get_records_after"):
+                return handler
+        return None
+    
+    @property
+    def logs(self):
+        return LogLines(self, self.get_logs())
+    
+    @logs.setter
+    def logs(self, value):
+        """兼容旧代码的 self.logs = []：清空内存缓冲区，列表中的内容写入logger"""
+        if isinstance(value, LogLines) and value._crawler is self:
+            # self.logs += [...] 已经在__iadd__中写入
+            return
+        warnings.warn("BaseCrawler.logs 已改为内存日志缓冲区的视图，请使用 add_log() 写日志",
+                      DeprecationWarning, stacklevel=2)
+        # 子类可能在调用BaseCrawler.__init__之前赋值
+        if getattr(self, "logger", None) is None:
+            return
+        buffer = self.log_buffer
+        if buffer is not None:
+            buffer.clear()
+        for message in value:
+            self.add_log(message)
+    
+    def get_logs(self, after_seq=0):
+        """从内存缓冲区获取序号after_seq之后的日志行"""
+        buffer = self.log_buffer
+        if buffer is None:
+            return []
+        return [line for _, line in buffer.get_records_after(after_seq)]
     
     def add_log(self, message):
-        self.logs.append(message)
+        self.logger.info(message)
+
+class CrawlerRun:
+    """一次爬虫执行，记录本次运行的参数、时间和结果"""
+    _ids = itertools.count(1)
+    
+    def __init__(self, crawler, params=None):
+        self.crawler = crawler
+        self.task_name = crawler.task_name
+        self.run_id = f"{crawler.task_name}-{time.strftime('%Y%m%d%H%M%S')}-{next(self._ids)}"
+        self.params = params if params is not None else crawler.params
+        self.status = "排队中"
+        self.submit_time = time.time()
+        self.start_time = None
+        self.end_time = None
+        self.error_info = None
+        self.exit_code = None
+        self.pid = None
+        self.resources = None
+        self.future = None
+        self._done = threading.Event()
+    
+    def execute(self):
+        """在工作线程中执行爬虫，返回本次运行对象"""
+        crawler = self.crawler
+        self.start_time = time.time()
+        self.status = "运行中"
+        crawler.params = self.params
+        crawler.current_run = self
+        # 进程内爬虫只能统计工作线程的CPU时间
+        thread_cpu = time.thread_time()
+        try:
+            crawler.run()
+        finally:
+            self.end_time = time.time()
+            self.status = crawler.status
+            self.error_info = crawler.error_info
+            self.exit_code = crawler.exit_code
+            self.pid = crawler.pid
+            self.resources = crawler.resources or {"cpu_seconds": round(time.thread_time() - thread_cpu, 3)}
+            crawler.resources = self.resources
+            self._done.set()
+        return self
+    
+    def cancel(self):
+        """取消尚未开始的运行，已开始的运行返回False"""
+        if self.future is not None and self.future.cancel():
+            self.status = "已取消"
+            self._done.set()
+            return True
+        return False
+    
+    def is_done(self):
+        return self._done.is_set()
+    
+    def wait(self, timeout=None):
+        return self._done.wait(timeout)
+    
+    @property
+    def wait_time(self):
+        """排队等待时间（秒）"""
+        if self.start_time is None:
+            return time.time() - self.submit_time
+        return self.start_time - self.submit_time
+    
+    @property
+    def duration(self):
+        """运行耗时（秒），尚未开始返回None"""
+        if self.start_time is None:
+            return None
+        return (self.end_time or time.time()) - self.start_time
@@ -0,0 +1,144 @@
+import ast
+import builtins
+import json
+import os
+import threading
+
+class CrawlerDiscovery:
+    """
+    爬虫文件静态扫描
+
+    通过AST查找文件中继承BaseCrawler的类，不执行模块代码，
+    扫描结果按 路径+修改时间+大小 缓存在crawlers目录下的清单文件中，
+    文件未变化时启动不需要重新解析。
+
+    能识别本文件内直接或间接继承BaseCrawler（包括 import ... as 别名）的类；
+    基类从其他模块导入、静态无法判断时返回"import"，由CrawlerManager导入模块后判断。
+    """
+    MANIFEST_NAME = "_discovery_cache.json"
+    # 清单格式版本，扫描规则变化时递增使旧缓存失效
+    MANIFEST_VERSION = 2
+
+    def __init__(self, crawlers_dir):
+        self.manifest_path = os.path.join(crawlers_dir, self.MANIFEST_NAME)
+        self._entries = {}
+        self._dirty = False
+        self._lock = threading.Lock()
+        self._load_manifest()
+
+    def _load_manifest(self):
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            if data.get("version") == self.MANIFEST_VERSION:
+                self._entries = data.get("entries", {})
+        except (OSError, ValueError):
+            self._entries = {}
+
+    def save(self):
+        """清单有变化时写回磁盘"""
+        with self._lock:
+            if not self._dirty:
+                return
+            entries = dict(self._entries)
+            self._dirty = False
+        try:
+            tmp_path = self.manifest_path + ".tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({"version": self.MANIFEST_VERSION, "entries": entries}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.manifest_path)
+        except OSError as e:
+            print(f"保存爬虫扫描缓存失败: {e}")
+
+    def scan(self, file_path):
+        """
+        获取文件的扫描结果，文件未变化时直接返回缓存
+
+        Returns:
+            {"kind": "class", "class_name": 类名} 标准爬虫类
+            {"kind": "import"} 继承了其他模块中的类，需要导入模块才能判断
+            {"kind": "script", "reason": 原因} 作为自定义脚本运行
+            {"kind": "error", "error": 错误信息} 无法解析
+        """
+        stat = os.stat(file_path)
+        with self._lock:
+            entry = self._entries.get(file_path)
+            if entry and entry["mtime_ns"] == stat.st_mtime_ns and entry["size"] == stat.st_size:
+                return entry["result"]
+        result = self.analyze(file_path)
+        with self._lock:
+            self._entries[file_path] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "result": result}
+            self._dirty = True
+        return result
+
+    def prune(self, existing_paths):
+        """移除已不存在的文件的缓存"""
+        with self._lock:
+            for file_path in list(self._entries):
+                if file_path not in existing_paths:
+                    del self._entries[file_path]
+                    self._dirty = True
+
+    @staticmethod
+    def analyze(file_path):
+        """解析文件并判断其类型"""
+        try:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            # 包含阻塞式调度器的文件只能作为自定义脚本运行
+            if 'BlockingScheduler' in content:
+                return {"kind": "script", "reason": "blocking_scheduler"}
+            tree = ast.parse(content, filename=file_path)
+        except (SyntaxError, UnicodeDecodeError, OSError) as e:
+            return {"kind": "error", "error": str(e)}
+
+        # 导入的名称：BaseCrawler的别名直接视为爬虫基类，其余导入的类无法静态判断
+        crawler_classes = {"BaseCrawler"}
+        imported_names = set()
+        star_import = False
+        for node in ast.walk(tree):
+            if isinstance(node, ast.ImportFrom):
+                for alias in node.names:
+                    if alias.name == "*":
+                        star_import = True
+                    elif alias.name == "BaseCrawler":
+                        crawler_classes.add(alias.asname or alias.name)
+                    else:
+                        imported_names.add(alias.asname or alias.name)
+            elif isinstance(node, ast.Import):
+                for alias in node.names:
+                    imported_names.add(alias.asname or alias.name.split(".")[0])
+
+        # 按定义顺序查找顶层类，支持本文件内的多级继承
+        candidates = []
+        local_classes = set()
+        unresolved = False
+        for node in tree.body:
+            if not isinstance(node, ast.ClassDef):
+                continue
+            local_classes.add(node.name)
+            base_names = {
+                base.attr if isinstance(base, ast.Attribute) else getattr(base, "id", None)
+                for base in node.bases
+            }
+            if not base_names & crawler_classes:
+                for base in node.bases:
+                    if isinstance(base, ast.Attribute):
+                        unresolved = True
+                    elif isinstance(base, ast.Name) and base.id not in local_classes and (
+                            base.id in imported_names or (star_import and not hasattr(builtins, base.id))):
+                        unresolved = True
+            if base_names & crawler_classes:
+                crawler_classes.add(node.name)
+                defines_crawl = any(
+                    isinstance(item, (ast.FunctionDef, ast.AsyncFunctionDef)) and item.name == "crawl"
+                    for item in node.body
+                )
+                candidates.append((node.name, defines_crawl))
+        if not candidates:
+            if unresolved:
+                return {"kind": "import"}
+            return {"kind": "script", "reason": "no_crawler_class"}
+        # 优先选择实现了crawl的类，跳过只做公共封装的中间基类
+        class_name = next((name for name, defines_crawl in candidates if defines_crawl), candidates[0][0])
+        return {"kind": "class", "class_name": class_name}
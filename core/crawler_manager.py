@@ -3,17 +3,35 @@ import os
 import sys
 import threading
 import time
-from core.base_crawler import BaseCrawler
+from collections import deque
+from core.base_crawler import BaseCrawler, CrawlerRun
+from core.crawler_discovery import CrawlerDiscovery
+from core.event_bus import EVENT_BUS, CRAWLERS_RELOADED
+from core.worker_pool import WorkerPool, PRIORITY_NORMAL
 from utils.log_manager import LogManager
+from utils.log_search import LogSearchIndex
+from utils.system_monitor import ProcessResourceTracker
+from utils.warm_pool import WarmPool
+from utils import metrics
 from core.db_manager import DBManager
+from core.db_retention import RetentionManager
 
 class CrawlerWrapper(BaseCrawler):
     """爬虫包装类，用于包装自定义脚本，使其能够在系统中运行"""
-    def __init__(self, task_name, module_path):
+    # 脚本最长执行时间（秒）
+    timeout = 3600
+    # 失败时保留在error_info中的stderr末尾行数
+    stderr_tail_lines = 50
+    # 单行输出的最大读取长度，防止无换行的超长输出占满内存
+    max_line_chars = 64 * 1024
+    
+    def __init__(self, task_name, module_path, warm_pool=None):
         super().__init__(task_name)
         self.module_path = module_path
         self.module_name = os.path.basename(module_path)[:-3]
         self.process = None
+        # 设置后从预热的解释器fork执行脚本，不可用时回退到subprocess
+        self.warm_pool = warm_pool
     
     def crawl(self):
         """执行自定义脚本"""
@@ -49,37 +67,54 @@ class CrawlerWrapper(BaseCrawler):
                         cmd.append(f"--{key}={value}")
             
             # 执行脚本，使用Popen以便能够终止进程，使用text=True并指定编码处理
-            self.process = subprocess.Popen(
-                cmd, 
-                stdout=subprocess.PIPE, 
-                stderr=subprocess.PIPE, 
-                text=True, 
-                encoding='utf-8',
-                errors='replace',
-                cwd=os.path.dirname(self.module_path)
-            )
+            # bufsize=1 行缓冲，配合PYTHONUNBUFFERED让子进程输出实时可见
+            env = dict(os.environ, PYTHONUNBUFFERED="1", PYTHONIOENCODING="utf-8")
+            if self.warm_pool is not None:
+                self.process = self.warm_pool.spawn(cmd[1:], env=env, cwd=os.path.dirname(self.module_path))
+            if self.process is None:
+                self.process = subprocess.Popen(
+                    cmd, 
+                    stdout=subprocess.PIPE, 
+                    stderr=subprocess.PIPE, 
+                    text=True, 
+                    encoding='utf-8',
+                    errors='replace',
+                    bufsize=1,
+                    env=env,
+                    cwd=os.path.dirname(self.module_path)
+                )
+            self.pid = self.process.pid
+            # 采样子进程树的CPU、内存、I/O等资源占用
+            self.resource_tracker = ProcessResourceTracker(self.pid).start()
+            
+            # 流式读取输出：两个读取线程逐行转发到日志，内存占用与输出量无关
+            stderr_tail = deque(maxlen=self.stderr_tail_lines)
+            readers = [
+                threading.Thread(target=self._pump_output, args=(self.process.stdout, self.logger.info, None), daemon=True),
+                threading.Thread(target=self._pump_output, args=(self.process.stderr, self.logger.error, stderr_tail), daemon=True),
+            ]
+            for reader in readers:
+                reader.start()
             
-            # 读取输出
             try:
-                stdout, stderr = self.process.communicate(timeout=3600)
+                returncode = self.process.wait(timeout=self.timeout)
             except subprocess.TimeoutExpired:
                 # 超时处理
                 if self.process:
                     self.process.terminate()
-                raise Exception("脚本执行超时")
-            
-            # 记录输出
-            if stdout:
-                self.logger.info(f"脚本输出: {stdout}")
-            if stderr:
-                self.logger.error(f"脚本错误: {stderr}")
+                raise
+            finally:
+                for reader in readers:
+                    reader.join(timeout=5)
             
-            if self.process.returncode == 0:
+            self.exit_code = returncode
+            if returncode == 0:
                 self.logger.info(f"自定义脚本执行完成: {self.module_name}")
             else:
-                self.logger.error(f"自定义脚本执行失败，返回码: {self.process.returncode}")
-                self.error_info = f"脚本执行失败，返回码: {self.process.returncode}\n错误信息: {stderr}"
-                raise Exception(f"脚本执行失败，返回码: {self.process.returncode}")
+                stderr = "".join(stderr_tail)
+                self.logger.error(f"自定义脚本执行失败，返回码: {returncode}")
+                self.error_info = f"脚本执行失败，返回码: {returncode}\n错误信息: {stderr}"
+                raise Exception(f"脚本执行失败，返回码: {returncode}")
                 
         except subprocess.TimeoutExpired:
             self.logger.error(f"自定义脚本执行超时: {self.module_name}")
@@ -98,6 +133,26 @@ class CrawlerWrapper(BaseCrawler):
         finally:
             # 确保进程被正确清理
             self.process = None
+            if self.resource_tracker is not None:
+                self.resources = self.resource_tracker.stop()
+                self.resource_tracker = None
+    
+    def _pump_output(self, stream, log, tail=None):
+        """逐行读取子进程输出并立即写入日志"""
+        try:
+            while True:
+                line = stream.readline(self.max_line_chars)
+                if not line:
+                    break
+                if tail is not None:
+                    tail.append(line)
+                line = line.rstrip("\r\n")
+                if line:
+                    log(line)
+        except Exception as e:
+            self.logger.error(f"读取脚本输出时出错: {e}")
+        finally:
+            stream.close()
     
     def stop(self):
         """停止自定义脚本"""
@@ -112,19 +167,110 @@ class CrawlerWrapper(BaseCrawler):
             finally:
                 self.process = None
 
+class LazyCrawler(BaseCrawler):
+    """延迟加载的爬虫，首次运行时才导入模块并创建真正的爬虫实例"""
+    def __init__(self, task_name, module_path, class_name, instance=None):
+        """
+        Args:
+            instance: 加载时已经导入模块并创建的爬虫实例，首次运行不再重复导入
+        """
+        super().__init__(task_name)
+        self.module_path = module_path
+        self.module_name = os.path.basename(module_path)[:-3]
+        self.class_name = class_name
+        self._instance = instance
+        self._load_lock = threading.Lock()
+    
+    def get_instance(self):
+        """导入模块并创建爬虫实例，只执行一次"""
+        with self._load_lock:
+            if self._instance is None:
+                spec = importlib.util.spec_from_file_location(self.module_name, self.module_path)
+                module = importlib.util.module_from_spec(spec)
+                sys.modules[self.module_name] = module
+                spec.loader.exec_module(module)
+                
+                cls = getattr(module, self.class_name, None)
+                if not (isinstance(cls, type) and issubclass(cls, BaseCrawler)):
+                    raise Exception(f"模块 {self.module_name} 中未找到爬虫类 {self.class_name}")
+                self._instance = cls(self.task_name)
+            return self._instance
+    
+    def crawl(self):
+        """在真正的爬虫实例上执行crawl，运行状态由本对象维护"""
+        instance = self.get_instance()
+        instance.logger = self.logger
+        instance.params = self.params
+        instance.current_run = self.current_run
+        instance.error_info = None
+        instance.exit_code = None
+        instance.resources = None
+        instance.running = True
+        try:
+            instance.crawl()
+        finally:
+            instance.running = False
+            self.exit_code = instance.exit_code
+            self.pid = instance.pid
+            self.resources = instance.resources
+            if instance.error_info:
+                self.error_info = instance.error_info
+    
+    def stop(self):
+        if self._instance is not None:
+            self._instance.stop()
+        super().stop()
+
 class CrawlerManager:
-    def __init__(self):
+    # 没有项目配置文件时按顺序查找的运行文件
+    default_run_files = ["main.py", "app.py", "run.py", "crawl.py"]
+    
+    def __init__(self, max_workers=None):
         self.crawlers = {}
+        # 每个任务加载时的来源指纹，用于增量重新加载
+        self.fingerprints = {}
+        # 加载失败的来源指纹，指纹变化前不再重试
+        self.failed_fingerprints = {}
+        self.crawlers_lock = threading.RLock()
+        self.watcher_thread = None
+        self.watcher_stop = threading.Event()
+        # 爬虫状态变化和重新加载事件，界面和控制接口订阅
+        self.event_bus = EVENT_BUS
         self.log_manager = LogManager()
         self.db_manager = DBManager()
+        # 所有运行都经过有界工作线程池，超出MAX_CRAWLERS的请求按优先级排队
+        self.max_workers = max_workers or int(os.environ.get("MAX_CRAWLERS", 10))
+        self.worker_pool = WorkerPool(self.max_workers, name="crawler")
+        # 每个任务最近一次的CrawlerRun
+        self.runs = {}
+        self.run_lock = threading.Lock()
+        # 后台按保留策略清理task_logs和task_history
+        self.retention = RetentionManager(self.db_manager)
+        self.retention.start()
+        # 后台增量建立日志全文索引
+        self.log_search = LogSearchIndex(self.log_manager.log_dir)
+        self.log_search.start()
+        # 运行状态指标，设置METRICS_PORT时提供/metrics接口
+        metrics.RUNS_ACTIVE.function = lambda: self.worker_pool.get_stats()["active"]
+        metrics.RUNS_QUEUED.function = lambda: self.worker_pool.get_stats()["queued"]
+        metrics.CRAWLERS_LOADED.function = lambda: len(self.get_crawlers())
+        self.metrics_server = metrics.MetricsServer().start() if os.environ.get("METRICS_PORT") else None
+        # 设置WARM_POOL=1时脚本爬虫从预加载了WARM_POOL_PRELOAD模块的模板进程fork执行（仅POSIX）
+        self.warm_pool = None
+        if os.environ.get("WARM_POOL", "0") != "0":
+            if WarmPool.supported():
+                try:
+                    self.warm_pool = WarmPool().start()
+                except Exception as e:
+                    # 预热解释器只是加速手段，启动失败时脚本爬虫照常用subprocess启动
+                    print(f"启动预热解释器失败，脚本爬虫使用subprocess启动: {e}")
+            else:
+                print("当前平台不支持预热解释器，脚本爬虫使用subprocess启动")
         self.load_crawlers()
     
-    def load_crawlers(self):
-        """加载crawlers目录下所有爬虫模块、自定义脚本和导入的项目"""
+    def _resolve_crawlers_dir(self):
+        """确定crawlers目录位置并加入sys.path"""
         # 获取当前工作目录（确保打包后能找到正确的crawlers目录）
-        import os
-        import sys
-        
         # 优先使用当前工作目录
         crawlers_dir = os.path.join(os.getcwd(), "crawlers")
         
@@ -141,73 +287,119 @@ class CrawlerManager:
         # 确保crawlers目录在sys.path中
         if crawlers_dir not in sys.path:
             sys.path.insert(0, crawlers_dir)
+        return crawlers_dir
+    
+    def _find_crawler_sources(self):
+        """
+        列出crawlers目录下的所有爬虫来源，只读取文件元数据
         
+        Returns:
+            {任务名: (类型, 路径, 指纹)}，类型为"file"或"project"，
+            指纹在文件或项目配置变化时改变
+        """
+        sources = {}
+        with os.scandir(self.crawlers_dir) as entries:
+            entries = sorted(entries, key=lambda entry: entry.name)
         # 首先处理直接放在crawlers目录下的单个文件
-        for file in os.listdir(crawlers_dir):
-            file_path = os.path.join(crawlers_dir, file)
-            
-            if os.path.isfile(file_path) and file.endswith(".py") and not file.startswith("_"):
-                module_name = file[:-3]
-                self._load_single_crawler_file(module_name, file_path)
+        for entry in entries:
+            if entry.is_file() and entry.name.endswith(".py") and not entry.name.startswith(("_", ".")):
+                stat = entry.stat()
+                sources[entry.name[:-3]] = ("file", entry.path, (stat.st_mtime_ns, stat.st_size))
+        # 然后处理子目录（导入的项目），同名时项目优先；跳过.git、.idea等隐藏目录
+        for entry in entries:
+            if entry.is_dir() and not entry.name.startswith(("_", ".")):
+                sources[entry.name] = ("project", entry.path, self._project_fingerprint(entry.path))
+        return sources
+    
+    def _project_fingerprint(self, project_path):
+        """项目的配置文件和默认运行文件决定了运行哪个脚本，脚本本身每次运行都会重新执行"""
+        fingerprint = []
+        for name in ["project_config.json"] + self.default_run_files:
+            try:
+                stat = os.stat(os.path.join(project_path, name))
+                fingerprint.append((name, stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                pass
+        return tuple(fingerprint)
+    
+    def _load_source(self, task_name, kind, path):
+        """按来源类型加载爬虫"""
+        if kind == "file":
+            self._load_single_crawler_file(task_name, path)
+        else:
+            self._load_project_crawler(task_name, path)
+    
+    def load_crawlers(self):
+        """加载crawlers目录下所有爬虫模块、自定义脚本和导入的项目"""
+        self.crawlers_dir = self._resolve_crawlers_dir()
+        self.discovery = CrawlerDiscovery(self.crawlers_dir)
         
-        # 然后处理子目录（导入的项目）
-        for dir_name in os.listdir(crawlers_dir):
-            dir_path = os.path.join(crawlers_dir, dir_name)
-            
-            if os.path.isdir(dir_path) and not dir_name.startswith("_"):
-                self._load_project_crawler(dir_name, dir_path)
+        sources = self._find_crawler_sources()
+        with self.crawlers_lock:
+            for task_name, (kind, path, fingerprint) in sources.items():
+                self._load_source(task_name, kind, path)
+                if task_name in self.crawlers:
+                    self.fingerprints[task_name] = fingerprint
+                else:
+                    self.failed_fingerprints[task_name] = fingerprint
+        
+        self.discovery.prune({path for kind, path, _ in sources.values() if kind == "file"})
+        self.discovery.save()
     
     def _load_single_crawler_file(self, module_name, file_path):
-        """加载单个爬虫文件"""
+        """加载单个爬虫文件，只做静态扫描，模块在首次运行时才导入"""
         try:
-            # 检查文件内容，避免加载包含阻塞式调度器的文件
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # 如果文件包含BlockingScheduler或其他阻塞式组件，跳过或特殊处理
-            if 'BlockingScheduler' in content:
-                print(f"模块 {module_name} 包含阻塞式调度器，将作为自定义脚本加载")
-                # 直接作为自定义脚本处理，不加载模块
-                crawler = CrawlerWrapper(module_name, file_path)
-                crawler.logger = self.log_manager.get_logger(module_name)
-                self.crawlers[module_name] = crawler
-                self.db_manager.add_task(module_name, module_name)
+            info = self.discovery.scan(file_path)
+            if info["kind"] == "error":
+                print(f"加载模块 {module_name} 失败: {info['error']}")
                 return
             
-            # 从crawlers目录加载模块
-            spec = importlib.util.spec_from_file_location(module_name, file_path)
-            module = importlib.util.module_from_spec(spec)
-            sys.modules[module_name] = module
-            spec.loader.exec_module(module)
-            
-            # 查找模块中的爬虫类
-            found = False
-            for name, cls in module.__dict__.items():
-                if isinstance(cls, type) and issubclass(cls, BaseCrawler) and cls != BaseCrawler:
-                    # 创建爬虫实例
-                    crawler = cls(module_name)
-                    # 为爬虫配置logger
-                    crawler.logger = self.log_manager.get_logger(module_name)
-                    self.crawlers[module_name] = crawler
-                    # 添加到数据库
-                    self.db_manager.add_task(module_name, module_name)
-                    found = True
-                    break
+            if info["kind"] == "import":
+                # 基类来自其他模块，静态扫描无法判断，导入模块后按继承关系查找
+                cls = self._find_crawler_class_by_import(module_name, file_path)
+                if cls is not None:
+                    crawler = LazyCrawler(module_name, file_path, cls.__name__, instance=cls(module_name))
+                else:
+                    print(f"模块 {module_name} 中未找到符合规范的爬虫类，将作为自定义脚本加载")
+                    crawler = CrawlerWrapper(module_name, file_path, warm_pool=self.warm_pool)
+            elif info["kind"] == "class":
+                crawler = LazyCrawler(module_name, file_path, info["class_name"])
+            else:
+                if info.get("reason") == "blocking_scheduler":
+                    print(f"模块 {module_name} 包含阻塞式调度器，将作为自定义脚本加载")
+                else:
+                    print(f"模块 {module_name} 中未找到符合规范的爬虫类，将作为自定义脚本加载")
+                crawler = CrawlerWrapper(module_name, file_path, warm_pool=self.warm_pool)
             
-            if not found:
-                # 如果没有找到符合规范的爬虫类，将其作为自定义脚本包装
-                print(f"模块 {module_name} 中未找到符合规范的爬虫类，将作为自定义脚本加载")
-                crawler = CrawlerWrapper(module_name, file_path)
-                # 为爬虫配置logger
-                crawler.logger = self.log_manager.get_logger(module_name)
-                self.crawlers[module_name] = crawler
-                # 添加到数据库
-                self.db_manager.add_task(module_name, module_name)
+            # 为爬虫配置logger
+            crawler.logger = self.log_manager.get_logger(module_name)
+            self.crawlers[module_name] = crawler
+            # 添加到数据库
+            self.db_manager.add_task(module_name, module_name)
         except Exception as e:
             print(f"加载模块 {module_name} 失败: {e}")
             import traceback
             traceback.print_exc()
     
+    def _find_crawler_class_by_import(self, module_name, file_path):
+        """导入模块并查找BaseCrawler子类，优先选择本模块中定义并实现了crawl的类"""
+        spec = importlib.util.spec_from_file_location(module_name, file_path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        
+        classes = [
+            cls for cls in vars(module).values()
+            if isinstance(cls, type) and issubclass(cls, BaseCrawler) and cls is not BaseCrawler
+        ]
+        local_classes = [cls for cls in classes if cls.__module__ == module.__name__]
+        for cls in local_classes:
+            if "crawl" in vars(cls):
+                return cls
+        if local_classes:
+            return local_classes[0]
+        return classes[0] if classes else None
+    
     def _load_project_crawler(self, project_name, project_path):
         """加载导入的项目爬虫"""
         try:
@@ -240,7 +432,7 @@ class CrawlerManager:
                 sys.path.insert(0, project_path)
             
             # 创建爬虫实例，使用项目名作为任务名
-            crawler = CrawlerWrapper(project_name, run_file_path)
+            crawler = CrawlerWrapper(project_name, run_file_path, warm_pool=self.warm_pool)
             crawler.logger = self.log_manager.get_logger(project_name)
             self.crawlers[project_name] = crawler
             self.db_manager.add_task(project_name, project_name)
@@ -254,9 +446,7 @@ class CrawlerManager:
     def _try_load_without_config(self, project_name, project_path):
         """尝试在没有配置文件的情况下加载项目"""
         # 查找项目中的main.py或app.py作为默认运行文件
-        default_run_files = ["main.py", "app.py", "run.py", "crawl.py"]
-        
-        for run_file in default_run_files:
+        for run_file in self.default_run_files:
             run_file_path = os.path.join(project_path, run_file)
             if os.path.exists(run_file_path):
                 # 将项目目录添加到sys.path
@@ -264,7 +454,7 @@ class CrawlerManager:
                     sys.path.insert(0, project_path)
                 
                 # 创建爬虫实例
-                crawler = CrawlerWrapper(project_name, run_file_path)
+                crawler = CrawlerWrapper(project_name, run_file_path, warm_pool=self.warm_pool)
                 crawler.logger = self.log_manager.get_logger(project_name)
                 self.crawlers[project_name] = crawler
                 self.db_manager.add_task(project_name, project_name)
@@ -275,50 +465,251 @@ class CrawlerManager:
         print(f"项目 {project_name} 中未找到合适的运行文件")
     
     def get_crawlers(self):
-        return self.crawlers
+        # 返回快照，重新加载在其他线程修改字典时调用方可以安全遍历
+        with self.crawlers_lock:
+            return dict(self.crawlers)
     
     def get_crawler(self, task_name):
-        return self.crawlers.get(task_name)
+        with self.crawlers_lock:
+            return self.crawlers.get(task_name)
+    
+    def get_run(self, task_name):
+        """获取任务最近一次的运行对象"""
+        return self.runs.get(task_name)
     
-    def run_crawler(self, task_name, params=None):
+    def run_crawler(self, task_name, params=None, priority=PRIORITY_NORMAL):
         crawler = self.get_crawler(task_name)
         if crawler:
-            if crawler.status != "运行中":
+            with self.run_lock:
+                # 同一任务同时只允许一个排队中或运行中的实例
+                current = self.runs.get(task_name)
+                if current is not None and not current.is_done():
+                    return False
                 # 更新参数
                 if params:
                     crawler.params = params
-                # 启动新线程运行爬虫
-                crawler.start()
+                crawler_run = CrawlerRun(crawler, crawler.params)
+                crawler.status = "排队中"
+                crawler_run.future = self.worker_pool.submit(self._execute_run, crawler_run, priority=priority)
+                self.runs[task_name] = crawler_run
                 return True
         return False
     
+    def _execute_run(self, crawler_run):
+        """在工作线程中执行一次运行并记录运行历史"""
+        metrics.RUNS_STARTED.inc(crawler_run.task_name)
+        metrics.QUEUE_WAIT.observe(value=time.time() - crawler_run.submit_time)
+        # 本次运行期间的日志记录都带有run_id
+        self.log_manager.set_run_id(crawler_run.task_name, crawler_run.run_id)
+        try:
+            crawler_run.execute()
+        finally:
+            self.log_manager.set_run_id(crawler_run.task_name, None)
+            self._record_run(crawler_run)
+        return crawler_run
+    
+    def _record_run(self, crawler_run):
+        """将运行结果写入task_history并更新任务状态"""
+        try:
+            fmt = "%Y-%m-%d %H:%M:%S"
+            start_time = time.strftime(fmt, time.localtime(crawler_run.start_time))
+            end_time = time.strftime(fmt, time.localtime(crawler_run.end_time)) if crawler_run.end_time else None
+            duration = round(crawler_run.duration, 3) if crawler_run.duration is not None else None
+            resources = crawler_run.resources or {}
+            result = {"完成": "succeeded", "失败": "failed"}.get(crawler_run.status, "stopped")
+            metrics.RUNS_FINISHED.inc(crawler_run.task_name, result)
+            if duration is not None:
+                metrics.RUN_DURATION.observe(crawler_run.task_name, value=duration)
+            self.db_manager.add_task_history(
+                crawler_run.task_name, crawler_run.status, start_time, end_time,
+                crawler_run.error_info, crawler_run.params, crawler_run.exit_code, duration,
+                pid=crawler_run.pid, peak_rss=resources.get("peak_rss"),
+                cpu_seconds=resources.get("cpu_seconds"), read_bytes=resources.get("read_bytes"),
+                write_bytes=resources.get("write_bytes"), max_fds=resources.get("max_fds"),
+                max_threads=resources.get("max_threads")
+            )
+            self.db_manager.update_task_status(crawler_run.task_name, crawler_run.status, start_time)
+        except Exception as e:
+            print(f"记录运行历史失败: {crawler_run.task_name}, {e}")
+    
+    def get_task_history(self, task_name, limit=50):
+        """获取任务的运行历史"""
+        return self.db_manager.get_task_history(task_name, limit)
+    
+    def search_logs(self, query, task_name=None, level=None, since=None, until=None, limit=200):
+        """全文检索任务日志，检索前先增量索引新写入的日志（后台正在索引时不等待）"""
+        self.log_manager.flush()
+        if task_name:
+            self.log_search.index_task(task_name, wait=False)
+        else:
+            self.log_search.index_all(wait=False)
+        return self.log_search.search(query, task_name, level, since, until, limit)
+    
+    def get_duration_stats(self, task_name=None, window=None):
+        """获取运行耗时分位数，未指定任务时返回所有任务的统计"""
+        if task_name:
+            return self.db_manager.get_task_duration_stats(task_name, window)
+        return self.db_manager.get_duration_stats_by_task(window)
+    
     def stop_crawler(self, task_name):
         crawler = self.get_crawler(task_name)
         if crawler:
+            crawler_run = self.runs.get(task_name)
+            if crawler_run is not None and crawler_run.cancel():
+                # 尚未开始执行的运行直接从队列中取消
+                crawler.status = "未运行"
+                return True
             crawler.stop()
             return True
         return False
     
+    def shutdown(self, wait=False):
+        """停止所有爬虫并关闭线程池"""
+        for task_name, crawler_run in list(self.runs.items()):
+            if not crawler_run.is_done():
+                self.stop_crawler(task_name)
+        self.stop_watching()
+        self.worker_pool.shutdown(wait=wait)
+        self.retention.stop()
+        self.log_search.stop()
+        if self.metrics_server is not None:
+            self.metrics_server.stop()
+        if self.warm_pool is not None:
+            self.warm_pool.stop()
+        # 确保排队中的状态、历史和日志写入落盘
+        self.db_manager.flush()
+        self.log_manager.flush()
+    
+    def set_max_workers(self, max_workers):
+        """调整最大并发爬虫数"""
+        self.max_workers = max_workers
+        self.worker_pool.resize(max_workers)
+    
+    def get_queue_stats(self):
+        """获取运行队列状态：活动数、排队数、等待时间及排队中的任务"""
+        stats = self.worker_pool.get_stats()
+        stats["queued_tasks"] = [
+            task_name for task_name, crawler_run in list(self.runs.items())
+            if crawler_run.status == "排队中"
+        ]
+        return stats
+    
+    def _is_active(self, task_name):
+        """任务是否有排队中或运行中的实例"""
+        crawler_run = self.runs.get(task_name)
+        return crawler_run is not None and not crawler_run.is_done()
+    
     def reload_crawlers(self):
-        """重新加载所有爬虫模块"""
-        self.crawlers.clear()
-        self.load_crawlers()
+        """
+        增量重新加载爬虫模块：只处理新增、删除和发生变化的文件或项目，
+        正在排队或运行的任务保持不变，等下次重新加载时再处理
+        
+        Returns:
+            {"added": [...], "removed": [...], "changed": [...], "skipped": [...]}
+        """
+        diff = {"added": [], "removed": [], "changed": [], "skipped": []}
+        sources = self._find_crawler_sources()
+        with self.crawlers_lock:
+            for task_name in [name for name in self.crawlers if name not in sources]:
+                if self._is_active(task_name):
+                    diff["skipped"].append(task_name)
+                    continue
+                del self.crawlers[task_name]
+                self.fingerprints.pop(task_name, None)
+                diff["removed"].append(task_name)
+            for task_name in [name for name in self.failed_fingerprints if name not in sources]:
+                del self.failed_fingerprints[task_name]
+            
+            for task_name, (kind, path, fingerprint) in sources.items():
+                existed = task_name in self.crawlers
+                if existed and self.fingerprints.get(task_name) == fingerprint:
+                    continue
+                if not existed and self.failed_fingerprints.get(task_name) == fingerprint:
+                    # 上次加载失败且未修改，不重复加载和输出错误
+                    continue
+                if existed and self._is_active(task_name):
+                    diff["skipped"].append(task_name)
+                    continue
+                previous = self.crawlers.pop(task_name, None)
+                self._load_source(task_name, kind, path)
+                crawler = self.crawlers.get(task_name)
+                if crawler is None:
+                    # 新版本加载失败
+                    self.fingerprints.pop(task_name, None)
+                    self.failed_fingerprints[task_name] = fingerprint
+                    if existed:
+                        diff["removed"].append(task_name)
+                    continue
+                self.fingerprints[task_name] = fingerprint
+                self.failed_fingerprints.pop(task_name, None)
+                if previous is not None:
+                    # 保留上次运行的状态，列表中不会因为重新加载而丢失
+                    crawler.status = previous.status if previous.status != "运行中" else "未运行"
+                    crawler.last_run_time = previous.last_run_time
+                    crawler.error_info = previous.error_info
+                    crawler.params = previous.params
+                    diff["changed"].append(task_name)
+                else:
+                    diff["added"].append(task_name)
+        
+        self.discovery.prune({path for kind, path, _ in sources.values() if kind == "file"})
+        self.discovery.save()
+        if any(diff[key] for key in ("added", "removed", "changed")):
+            print(f"爬虫模块已重新加载: {diff}")
+            self.event_bus.publish(CRAWLERS_RELOADED, diff=diff)
+        return diff
+    
+    def start_watching(self, interval=2.0, callback=None):
+        """
+        轮询crawlers目录的修改时间，发生变化时自动增量重新加载
+        
+        Args:
+            interval: 轮询间隔（秒）
+            callback: 有变化时以diff字典为参数调用，在监视线程中执行
+        """
+        if self.watcher_thread is not None and self.watcher_thread.is_alive():
+            return
+        self.watcher_stop.clear()
+        
+        def watch():
+            last_sources = {name: source[2] for name, source in self._find_crawler_sources().items()}
+            while not self.watcher_stop.wait(interval):
+                try:
+                    current = {name: source[2] for name, source in self._find_crawler_sources().items()}
+                    # 上次因任务运行而跳过的变化也需要重试，加载失败且未修改的来源除外
+                    pending = any(self.fingerprints.get(name) != fingerprint and self.failed_fingerprints.get(name) != fingerprint
+                                  for name, fingerprint in current.items()) \
+                        or any(name not in current for name in self.fingerprints)
+                    if current == last_sources and not pending:
+                        continue
+                    last_sources = current
+                    diff = self.reload_crawlers()
+                    if callback and any(diff[key] for key in ("added", "removed", "changed")):
+                        callback(diff)
+                except Exception as e:
+                    print(f"监视爬虫目录失败: {e}")
+        
+        self.watcher_thread = threading.Thread(target=watch, name="crawler-watcher", daemon=True)
+        self.watcher_thread.start()
+    
+    def stop_watching(self):
+        self.watcher_stop.set()
+    
+    @staticmethod
+    def _crawler_status(task_name, crawler):
+        return {
+            "task_name": task_name,
+            "status": crawler.status,
+            "last_run_time": crawler.last_run_time,
+            "error_info": crawler.error_info
+        }
     
     def get_crawler_status(self, task_name):
         crawler = self.get_crawler(task_name)
         if crawler:
-            return {
-                "task_name": task_name,
-                "status": crawler.status,
-                "last_run_time": crawler.last_run_time,
-                "error_info": crawler.error_info
-            }
+            return self._crawler_status(task_name, crawler)
         return None
     
     def get_all_crawler_status(self):
-        status_list = []
-        for task_name in self.crawlers:
-            status = self.get_crawler_status(task_name)
-            if status:
-                status_list.append(status)
-        return status_list
+        # 遍历快照，监视线程重新加载时不会在遍历中修改字典
+        return [self._crawler_status(task_name, crawler) for task_name, crawler in self.get_crawlers().items()]
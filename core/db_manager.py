@@ -1,211 +1,269 @@
 import sqlite3
 import os
+import threading
 import time
+from contextlib import contextmanager
+from core.db_migrations import migrate
+from core.db_writer import DBWriter
+from utils import metrics
 
 class DBManager:
-    def __init__(self, db_file="crawler.db"):
+    # 等待数据库锁的最长时间（秒）
+    busy_timeout = 30
+    # 本进程内已完成迁移的数据库文件
+    _migrated_files = set()
+    _migrate_lock = threading.Lock()
+    
+    def __init__(self, db_file="crawler.db", async_writes=True):
         import os
         # 确保数据库文件在当前工作目录
         self.db_file = os.path.join(os.getcwd(), db_file)
+        # 每个线程复用自己的连接，避免每次操作都重新打开数据库
+        self._local = threading.local()
+        self._connections = {}
+        self._connections_lock = threading.Lock()
         self.init_db()
+        # 状态、历史、日志等高频写入交给后台线程批量提交，调用方不等待磁盘
+        self.writer = DBWriter(self._create_connection) if async_writes else None
+    
+    def _create_connection(self):
+        """创建新的数据库连接并配置WAL模式"""
+        conn = sqlite3.connect(self.db_file, timeout=self.busy_timeout, check_same_thread=False)
+        # 只对尚未建表的新数据库生效，旧数据库需手动执行 python -m crawlytools vacuum 转换
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+        # WAL模式下读写互不阻塞，synchronous=NORMAL只在检查点时fsync
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute(f"PRAGMA busy_timeout={int(self.busy_timeout * 1000)}")
+        return conn
+    
+    def _get_connection(self):
+        """获取当前线程的数据库连接，首次使用时创建"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._create_connection()
+            self._local.conn = conn
+            current = threading.current_thread()
+            with self._connections_lock:
+                # 关闭已结束线程遗留的连接
+                for ident, (thread, old_conn) in list(self._connections.items()):
+                    if not thread.is_alive():
+                        old_conn.close()
+                        del self._connections[ident]
+                self._connections[current.ident] = (current, conn)
+        return conn
+    
+    @contextmanager
+    def _transaction(self):
+        """在当前线程的连接上执行写事务，异常时回滚"""
+        conn = self._get_connection()
+        try:
+            yield conn.cursor()
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    
+    def _write(self, sql, params=()):
+        """执行一条写语句：启用后台写入时排队，否则立即提交"""
+        if self.writer is not None:
+            self.writer.submit(sql, params)
+        else:
+            start = time.perf_counter()
+            with self._transaction() as cursor:
+                cursor.execute(sql, params)
+            metrics.DB_WRITE_SECONDS.observe(value=time.perf_counter() - start)
+            metrics.DB_ROWS_WRITTEN.inc()
+    
+    def flush(self, timeout=None):
+        """等待所有排队中的写入完成"""
+        if self.writer is not None:
+            return self.writer.flush(timeout)
+        return True
+    
+    def close(self):
+        """写完排队中的数据并关闭所有数据库连接"""
+        if self.writer is not None:
+            self.writer.close()
+        with self._connections_lock:
+            for thread, conn in self._connections.values():
+                conn.close()
+            self._connections.clear()
+        self._local = threading.local()
     
     def init_db(self):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        
-        # 创建任务表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_name TEXT UNIQUE NOT NULL,
-            module_name TEXT NOT NULL,
-            status TEXT DEFAULT '未运行',
-            last_run_time TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # 创建任务日志表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS task_logs (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_name TEXT NOT NULL,
-            log_level TEXT NOT NULL,
-            message TEXT NOT NULL,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        # 创建任务运行历史表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS task_history (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_name TEXT NOT NULL,
-            status TEXT NOT NULL,
-            start_time TEXT NOT NULL,
-            end_time TEXT,
-            error_info TEXT,
-            params TEXT
-        )
-        ''')
-        
-        # 创建定时任务表
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS cron_tasks (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            task_name TEXT UNIQUE NOT NULL,
-            cron_expression TEXT NOT NULL,
-            enabled INTEGER DEFAULT 0,
-            params TEXT,
-            last_run TEXT,
-            next_run TEXT,
-            created_at TEXT DEFAULT CURRENT_TIMESTAMP,
-            updated_at TEXT DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-        
-        conn.commit()
-        conn.close()
+        """执行表结构迁移，同一数据库文件在进程内只检查一次"""
+        with DBManager._migrate_lock:
+            if self.db_file in DBManager._migrated_files:
+                return
+            migrate(self._get_connection())
+            DBManager._migrated_files.add(self.db_file)
     
     def add_task(self, task_name, module_name):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO tasks (task_name, module_name, created_at) VALUES (?, ?, ?)",
-            (task_name, module_name, time.strftime("%Y-%m-%d %H:%M:%S"))
-        )
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            # 已存在的任务只更新模块名，保留created_at、状态和上次运行时间
+            cursor.execute(
+                "INSERT INTO tasks (task_name, module_name, created_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(task_name) DO UPDATE SET module_name = excluded.module_name",
+                (task_name, module_name, time.strftime("%Y-%m-%d %H:%M:%S"))
+            )
     
     def update_task_status(self, task_name, status, last_run_time=None):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
         if last_run_time:
-            cursor.execute(
+            self._write(
                 "UPDATE tasks SET status = ?, last_run_time = ? WHERE task_name = ?",
                 (status, last_run_time, task_name)
             )
         else:
-            cursor.execute(
+            self._write(
                 "UPDATE tasks SET status = ? WHERE task_name = ?",
                 (status, task_name)
             )
-        conn.commit()
-        conn.close()
     
     def add_task_log(self, task_name, log_level, message):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute(
+        self._write(
             "INSERT INTO task_logs (task_name, log_level, message) VALUES (?, ?, ?)",
             (task_name, log_level, message)
         )
-        conn.commit()
-        conn.close()
     
-    def add_task_history(self, task_name, status, start_time, end_time=None, error_info=None, params=None):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT INTO task_history (task_name, status, start_time, end_time, error_info, params) VALUES (?, ?, ?, ?, ?, ?)",
-            (task_name, status, start_time, end_time, error_info, str(params) if params else None)
+    def add_task_history(self, task_name, status, start_time, end_time=None, error_info=None, params=None,
+                         exit_code=None, duration=None, pid=None, peak_rss=None, cpu_seconds=None,
+                         read_bytes=None, write_bytes=None, max_fds=None, max_threads=None):
+        self._write(
+            "INSERT INTO task_history (task_name, status, start_time, end_time, error_info, params, exit_code, duration, "
+            "pid, peak_rss, cpu_seconds, read_bytes, write_bytes, max_fds, max_threads) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (task_name, status, start_time, end_time, error_info, str(params) if params else None, exit_code, duration,
+             pid, peak_rss, cpu_seconds, read_bytes, write_bytes, max_fds, max_threads)
         )
-        conn.commit()
-        conn.close()
     
     def get_tasks(self):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
         cursor.execute("SELECT task_name, module_name, status, last_run_time FROM tasks")
         tasks = cursor.fetchall()
-        conn.close()
         return tasks
     
     def get_task_history(self, task_name, limit=50):
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
         cursor.execute(
-            "SELECT status, start_time, end_time, error_info, params FROM task_history WHERE task_name = ? ORDER BY id DESC LIMIT ?",
+            "SELECT status, start_time, end_time, error_info, params, exit_code, duration, pid, peak_rss, "
+            "cpu_seconds, read_bytes, write_bytes, max_fds, max_threads FROM task_history "
+            "WHERE task_name = ? ORDER BY id DESC LIMIT ?",
             (task_name, limit)
         )
         history = cursor.fetchall()
-        conn.close()
         return history
     
+    def get_task_duration_stats(self, task_name, window=None, percentiles=(50, 90, 95, 99)):
+        """
+        统计任务运行耗时的分位数
+        
+        Args:
+            task_name: 任务名称
+            window: 只统计最近window秒内开始的运行，None表示全部
+            percentiles: 需要计算的分位数
+            
+        Returns:
+            包含count、min、max、avg和p50等分位数（秒）的字典，没有记录时返回None
+        """
+        sql = "SELECT duration FROM task_history WHERE task_name = ? AND duration IS NOT NULL"
+        args = [task_name]
+        if window:
+            sql += " AND start_time >= ?"
+            args.append(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - window)))
+        cursor = self._get_connection().cursor()
+        cursor.execute(sql + " ORDER BY duration", args)
+        durations = [row[0] for row in cursor.fetchall()]
+        return self._duration_stats(durations, percentiles)
+    
+    def get_duration_stats_by_task(self, window=None, percentiles=(50, 90, 95, 99)):
+        """统计所有任务的运行耗时分位数，返回 {任务名: 统计字典}"""
+        sql = "SELECT task_name, duration FROM task_history WHERE duration IS NOT NULL"
+        args = []
+        if window:
+            sql += " AND start_time >= ?"
+            args.append(time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(time.time() - window)))
+        cursor = self._get_connection().cursor()
+        cursor.execute(sql + " ORDER BY task_name, duration", args)
+        durations = {}
+        for task_name, duration in cursor.fetchall():
+            durations.setdefault(task_name, []).append(duration)
+        return {task_name: self._duration_stats(values, percentiles) for task_name, values in durations.items()}
+    
+    @staticmethod
+    def _duration_stats(durations, percentiles):
+        """按最近秩法计算已排序耗时列表的统计值"""
+        if not durations:
+            return None
+        count = len(durations)
+        stats = {
+            "count": count,
+            "min": round(durations[0], 3),
+            "max": round(durations[-1], 3),
+            "avg": round(sum(durations) / count, 3),
+        }
+        for p in percentiles:
+            rank = max(1, -(-p * count // 100))
+            stats[f"p{p}"] = round(durations[min(rank, count) - 1], 3)
+        return stats
+    
     def add_or_update_cron_task(self, task_name, cron_expression, enabled=0, params=None):
         """添加或更新定时任务"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute(
-            "INSERT OR REPLACE INTO cron_tasks (task_name, cron_expression, enabled, params, updated_at) VALUES (?, ?, ?, ?, ?)",
-            (task_name, cron_expression, enabled, str(params) if params else None, time.strftime("%Y-%m-%d %H:%M:%S"))
-        )
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute(
+                "INSERT OR REPLACE INTO cron_tasks (task_name, cron_expression, enabled, params, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (task_name, cron_expression, enabled, str(params) if params else None, time.strftime("%Y-%m-%d %H:%M:%S"))
+            )
     
     def get_cron_task(self, task_name):
         """获取指定任务的定时设置"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
         cursor.execute(
             "SELECT task_name, cron_expression, enabled, params, last_run, next_run FROM cron_tasks WHERE task_name = ?",
             (task_name,)
         )
         task = cursor.fetchone()
-        conn.close()
         return task
     
     def get_all_cron_tasks(self):
         """获取所有定时任务"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
+        cursor = self._get_connection().cursor()
         cursor.execute(
             "SELECT task_name, cron_expression, enabled, params, last_run, next_run FROM cron_tasks"
         )
         tasks = cursor.fetchall()
-        conn.close()
         return tasks
     
     def enable_cron_task(self, task_name, enabled=True):
         """启用或禁用定时任务"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute(
-            "UPDATE cron_tasks SET enabled = ? WHERE task_name = ?",
-            (1 if enabled else 0, task_name)
-        )
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute(
+                "UPDATE cron_tasks SET enabled = ? WHERE task_name = ?",
+                (1 if enabled else 0, task_name)
+            )
     
     def update_cron_task_run_time(self, task_name, last_run=None, next_run=None):
         """更新定时任务的运行时间"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
         if last_run and next_run:
-            cursor.execute(
+            self._write(
                 "UPDATE cron_tasks SET last_run = ?, next_run = ? WHERE task_name = ?",
                 (last_run, next_run, task_name)
             )
         elif last_run:
-            cursor.execute(
+            self._write(
                 "UPDATE cron_tasks SET last_run = ? WHERE task_name = ?",
                 (last_run, task_name)
             )
         elif next_run:
-            cursor.execute(
+            self._write(
                 "UPDATE cron_tasks SET next_run = ? WHERE task_name = ?",
                 (next_run, task_name)
             )
-        conn.commit()
-        conn.close()
     
     def delete_cron_task(self, task_name):
         """删除定时任务"""
-        conn = sqlite3.connect(self.db_file)
-        cursor = conn.cursor()
-        cursor.execute(
-            "DELETE FROM cron_tasks WHERE task_name = ?",
-            (task_name,)
-        )
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.execute(
+                "DELETE FROM cron_tasks WHERE task_name = ?",
+                (task_name,)
+            )
@@ -0,0 +1,141 @@
+"""
+crawler.db 表结构迁移
+
+每个迁移对应一个版本号，已应用的最高版本记录在 PRAGMA user_version 中。
+新增字段或索引时在 MIGRATIONS 末尾追加新的迁移函数，不要修改已发布的迁移。
+"""
+
+
+def _add_columns(cursor, table, columns):
+    """为表补充缺失的列（兼容迁移系统之前手动加过列的数据库）"""
+    cursor.execute(f"PRAGMA table_info({table})")
+    existing = {row[1] for row in cursor.fetchall()}
+    for name, column_type in columns:
+        if name not in existing:
+            cursor.execute(f"ALTER TABLE {table} ADD COLUMN {name} {column_type}")
+
+
+def _migration_1(cursor):
+    """基础表结构"""
+    # 任务表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_name TEXT UNIQUE NOT NULL,
+        module_name TEXT NOT NULL,
+        status TEXT DEFAULT '未运行',
+        last_run_time TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # 任务日志表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS task_logs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_name TEXT NOT NULL,
+        log_level TEXT NOT NULL,
+        message TEXT NOT NULL,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # 任务运行历史表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS task_history (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_name TEXT NOT NULL,
+        status TEXT NOT NULL,
+        start_time TEXT NOT NULL,
+        end_time TEXT,
+        error_info TEXT,
+        params TEXT
+    )
+    ''')
+
+    # 定时任务表
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS cron_tasks (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        task_name TEXT UNIQUE NOT NULL,
+        cron_expression TEXT NOT NULL,
+        enabled INTEGER DEFAULT 0,
+        params TEXT,
+        last_run TEXT,
+        next_run TEXT,
+        created_at TEXT DEFAULT CURRENT_TIMESTAMP,
+        updated_at TEXT DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _migration_2(cursor):
+    """运行历史记录退出码和耗时，并按任务、开始时间建立索引"""
+    _add_columns(cursor, "task_history", [("exit_code", "INTEGER"), ("duration", "REAL")])
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_history_task_id ON task_history (task_name, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_history_start_time ON task_history (start_time)")
+
+
+def _migration_3(cursor):
+    """任务日志索引，运行历史记录进程号和峰值内存"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_logs_task_created ON task_logs (task_name, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_task_logs_created ON task_logs (created_at)")
+    _add_columns(cursor, "task_history", [("pid", "INTEGER"), ("peak_rss", "INTEGER")])
+
+
+def _migration_4(cursor):
+    """运行历史记录CPU时间、读写字节数、文件句柄和线程数峰值"""
+    _add_columns(cursor, "task_history", [
+        ("cpu_seconds", "REAL"),
+        ("read_bytes", "INTEGER"),
+        ("write_bytes", "INTEGER"),
+        ("max_fds", "INTEGER"),
+        ("max_threads", "INTEGER"),
+    ])
+
+
+# (版本号, 说明, 迁移函数)，版本号必须递增
+MIGRATIONS = [
+    (1, "基础表结构", _migration_1),
+    (2, "运行历史退出码、耗时及索引", _migration_2),
+    (3, "任务日志索引、运行历史进程号和峰值内存", _migration_3),
+    (4, "运行历史资源占用", _migration_4),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def migrate(conn):
+    """
+    将数据库升级到最新版本
+
+    每个迁移在独立的 BEGIN IMMEDIATE 事务中执行并更新 user_version，
+    多个进程同时启动时只有一个会真正执行迁移。
+
+    Returns:
+        本次应用的迁移版本号列表
+    """
+    applied = []
+    if get_version(conn) >= SCHEMA_VERSION:
+        return applied
+    cursor = conn.cursor()
+    for version, description, migration in MIGRATIONS:
+        cursor.execute("BEGIN IMMEDIATE")
+        try:
+            # 拿到写锁后重新检查，其他进程可能已完成此迁移
+            if get_version(conn) >= version:
+                conn.rollback()
+                continue
+            migration(cursor)
+            cursor.execute(f"PRAGMA user_version = {int(version)}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied.append(version)
+        print(f"数据库迁移完成: v{version} {description}")
+    return applied
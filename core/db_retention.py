@@ -0,0 +1,182 @@
+import gzip
+import json
+import os
+import threading
+import time
+
+class RetentionManager:
+    """
+    task_logs / task_history 数据保留策略
+
+    后台线程定期按保留天数和每个任务的最大行数小批量删除旧数据，
+    可选地将删除的行追加到按天分文件的gzip压缩JSONL归档中。
+    增量回收模式的数据库通过incremental_vacuum把释放的页面归还给文件系统；
+    旧数据库只删除数据，空闲页留给之后的写入复用，需要回收空间时手动执行
+    python -m crawlytools vacuum 转换（见enable_incremental_vacuum）。
+    """
+    # 每张表的时间字段及其时区：task_logs.created_at 由 CURRENT_TIMESTAMP 生成（UTC），
+    # task_history.start_time 由程序按本地时间写入
+    TABLES = {
+        "task_logs": ("created_at", time.gmtime),
+        "task_history": ("start_time", time.localtime),
+    }
+
+    def __init__(self, db_manager, log_retention_days=None, history_retention_days=None,
+                 log_max_rows=None, history_max_rows=None, archive_dir=None,
+                 interval=None, batch_size=1000, batch_pause=0.05, vacuum_pages=1000):
+        """
+        Args:
+            db_manager: DBManager实例
+            log_retention_days: task_logs保留天数，0表示不按时间清理
+            history_retention_days: task_history保留天数，0表示不按时间清理
+            log_max_rows: 每个任务最多保留的日志行数，0表示不限制
+            history_max_rows: 每个任务最多保留的运行历史行数，0表示不限制
+            archive_dir: 删除前归档到该目录，None表示不归档
+            interval: 两次清理之间的间隔（秒）
+            batch_size: 每个删除事务处理的行数
+            batch_pause: 批次之间的暂停时间（秒），让出写锁
+            vacuum_pages: 每次incremental_vacuum最多回收的页数
+        """
+        env = os.environ.get
+        self.db_manager = db_manager
+        self.limits = {
+            "task_logs": (
+                int(log_retention_days if log_retention_days is not None else env("LOG_RETENTION_DAYS", 30)),
+                int(log_max_rows if log_max_rows is not None else env("LOG_MAX_ROWS_PER_TASK", 100000)),
+            ),
+            "task_history": (
+                int(history_retention_days if history_retention_days is not None else env("HISTORY_RETENTION_DAYS", 180)),
+                int(history_max_rows if history_max_rows is not None else env("HISTORY_MAX_ROWS_PER_TASK", 10000)),
+            ),
+        }
+        self.archive_dir = archive_dir if archive_dir is not None else env("RETENTION_ARCHIVE_DIR") or None
+        self.interval = float(interval if interval is not None else env("RETENTION_INTERVAL", 3600))
+        self.batch_size = batch_size
+        self.batch_pause = batch_pause
+        self.vacuum_pages = vacuum_pages
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动后台清理线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._loop, name="db-retention", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        # 启动后稍等片刻，避开程序初始化阶段的数据库访问高峰
+        if self._stop_event.wait(60):
+            return
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"清理历史数据失败: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def run_once(self):
+        """执行一轮清理，返回 {表名: 删除行数}"""
+        # 先让排队中的写入落盘，避免与写入线程争抢
+        self.db_manager.flush()
+        conn = self.db_manager._create_connection()
+        try:
+            deleted = {}
+            for table, (days, max_rows) in self.limits.items():
+                count = 0
+                if days > 0:
+                    column, to_time = self.TABLES[table]
+                    cutoff = time.strftime("%Y-%m-%d %H:%M:%S", to_time(time.time() - days * 86400))
+                    count += self._prune(conn, table, f"{column} < ?", (cutoff,))
+                if max_rows > 0:
+                    count += self._prune_per_task(conn, table, max_rows)
+                deleted[table] = count
+            if any(deleted.values()):
+                if self._incremental_vacuum_enabled(conn):
+                    self._vacuum(conn)
+                print(f"历史数据清理完成: {deleted}")
+            return deleted
+        finally:
+            conn.close()
+
+    def _prune_per_task(self, conn, table, max_rows):
+        """每个任务只保留最新的max_rows行"""
+        count = 0
+        tasks = conn.execute(
+            f"SELECT task_name FROM {table} GROUP BY task_name HAVING COUNT(*) > ?", (max_rows,)
+        ).fetchall()
+        for (task_name,) in tasks:
+            row = conn.execute(
+                f"SELECT id FROM {table} WHERE task_name = ? ORDER BY id DESC LIMIT 1 OFFSET ?",
+                (task_name, max_rows)
+            ).fetchone()
+            if row:
+                count += self._prune(conn, table, "task_name = ? AND id <= ?", (task_name, row[0]))
+        return count
+
+    def _prune(self, conn, table, where, args):
+        """按条件小批量删除，每批一个事务"""
+        count = 0
+        while not self._stop_event.is_set():
+            rows = conn.execute(
+                f"SELECT * FROM {table} WHERE {where} ORDER BY id LIMIT ?", (*args, self.batch_size)
+            ).fetchall()
+            if not rows:
+                break
+            if self.archive_dir:
+                columns = [d[0] for d in conn.execute(f"SELECT * FROM {table} LIMIT 0").description]
+                self._archive(table, columns, rows)
+            with conn:
+                conn.executemany(f"DELETE FROM {table} WHERE id = ?", [(row[0],) for row in rows])
+            count += len(rows)
+            if len(rows) < self.batch_size:
+                break
+            time.sleep(self.batch_pause)
+        return count
+
+    def _archive(self, table, columns, rows):
+        """将删除的行追加到gzip压缩的JSONL归档文件"""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"{table}-{time.strftime('%Y%m%d')}.jsonl.gz")
+        # 追加模式会写入新的gzip成员，gzip读取时会自动连接
+        with gzip.open(path, "at", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json.dumps(dict(zip(columns, row)), ensure_ascii=False) + "\n")
+
+    @staticmethod
+    def _incremental_vacuum_enabled(conn):
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 2
+
+    def enable_incremental_vacuum(self):
+        """
+        将旧数据库切换到增量回收模式，返回是否执行了转换
+
+        转换需要执行一次完整的VACUUM：重建整个数据库文件，期间独占写锁，
+        并需要约为数据库大小两倍的磁盘空间，只应在没有爬虫运行时手动执行。
+        """
+        self.db_manager.flush()
+        conn = self.db_manager._create_connection()
+        try:
+            if self._incremental_vacuum_enabled(conn):
+                return False
+            conn.execute("PRAGMA auto_vacuum = INCREMENTAL")
+            conn.execute("VACUUM")
+            return True
+        finally:
+            conn.close()
+
+    def _vacuum(self, conn):
+        """逐步回收空闲页，每次最多vacuum_pages页"""
+        while not self._stop_event.is_set():
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+            if free_pages <= 0:
+                break
+            # incremental_vacuum每步回收一页，需要取完结果才会全部执行
+            conn.execute(f"PRAGMA incremental_vacuum({min(free_pages, self.vacuum_pages)})").fetchall()
+            time.sleep(self.batch_pause)
@@ -0,0 +1,132 @@
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from utils import metrics
+
+logger = logging.getLogger(__name__)
+
+class DBWriter:
+    """数据库后台写入线程，将零散的单行写入合并为批量事务"""
+    def __init__(self, connect, batch_size=500, flush_interval=0.2, lock_retries=3, retry_backoff=0.5):
+        """
+        Args:
+            connect: 创建数据库连接的函数，连接只在写入线程中使用
+            batch_size: 累计多少条语句后立即提交
+            flush_interval: 最长等待多少秒后提交（秒）
+            lock_retries: 数据库被锁定时的重试次数
+            retry_backoff: 首次重试前的等待时间（秒），之后每次翻倍
+        """
+        self._connect = connect
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.lock_retries = lock_retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue()
+        self._closed = False
+        self.rows_written = 0
+        # 重试后仍然失败、被丢弃的语句数
+        self.rows_failed = 0
+        self.batches_written = 0
+        self._thread = threading.Thread(target=self._run, name="db-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params=()):
+        """提交一条写语句，立即返回"""
+        if self._closed:
+            raise RuntimeError("DBWriter已关闭")
+        self._queue.put((sql, params))
+
+    def flush(self, timeout=None):
+        """等待此前提交的所有语句写入数据库"""
+        if not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=None):
+        """写完剩余语句后停止写入线程"""
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        conn = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                item = self._queue.get()
+                batch = []
+                waiters = []
+                deadline = time.monotonic() + self.flush_interval
+                # 收集一批语句：达到batch_size或超过flush_interval即提交
+                while True:
+                    if item is None:
+                        stopping = True
+                    elif isinstance(item, threading.Event):
+                        waiters.append(item)
+                    else:
+                        batch.append(item)
+                    if stopping or waiters or len(batch) >= self.batch_size:
+                        break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                if batch:
+                    self._write_batch(conn, batch)
+                for waiter in waiters:
+                    waiter.set()
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _is_locked(error):
+        message = str(error).lower()
+        return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "busy" in message)
+
+    def _commit(self, conn, statements):
+        """在一个事务中执行语句，数据库被锁定时按退避时间重试"""
+        for attempt in range(self.lock_retries + 1):
+            try:
+                with conn:
+                    for sql, params in statements:
+                        conn.execute(sql, params)
+                return
+            except Exception as e:
+                if attempt >= self.lock_retries or not self._is_locked(e):
+                    raise
+                logger.warning("数据库被锁定，%.1f秒后重试: %s", self.retry_backoff * 2 ** attempt, e)
+                time.sleep(self.retry_backoff * 2 ** attempt)
+
+    def _write_batch(self, conn, batch):
+        start = time.perf_counter()
+        written = 0
+        failed = 0
+        try:
+            self._commit(conn, batch)
+            written = len(batch)
+        except Exception as e:
+            # 整批失败时逐条重试，只丢弃出错的语句
+            logger.warning("批量写入数据库失败，改为逐条写入: %s", e)
+            for sql, params in batch:
+                try:
+                    self._commit(conn, [(sql, params)])
+                    written += 1
+                except Exception as e:
+                    failed += 1
+                    logger.error("写入数据库失败，已丢弃: %s, 语句: %s, 参数: %s", e, sql, params)
+        self.rows_written += written
+        self.rows_failed += failed
+        self.batches_written += 1
+        metrics.DB_WRITE_SECONDS.observe(value=time.perf_counter() - start)
+        metrics.DB_ROWS_WRITTEN.inc(amount=written)
+        if failed:
+            metrics.DB_ROWS_FAILED.inc(amount=failed)
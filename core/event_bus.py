@@ -0,0 +1,39 @@
+import threading
+
+# 爬虫状态变化，参数: task_name, status, old_status
+CRAWLER_STATUS = "crawler.status"
+# 重新加载crawlers目录后有增删改，参数: diff（added、removed、changed列表）
+CRAWLERS_RELOADED = "crawlers.reloaded"
+
+class EventBus:
+    """
+    进程内发布/订阅
+    
+    publish在发布者所在的线程中依次同步调用订阅者，订阅者需要自行切换线程
+    （界面用wx.CallAfter，事件循环用call_soon_threadsafe），并且不应执行耗时操作。
+    """
+    def __init__(self):
+        self._subscribers = {}
+        self._lock = threading.Lock()
+    
+    def subscribe(self, topic, callback):
+        """订阅主题，返回callback以便之后取消订阅"""
+        with self._lock:
+            # 复制后替换，发布时不需要加锁遍历
+            self._subscribers[topic] = self._subscribers.get(topic, ()) + (callback,)
+        return callback
+    
+    def unsubscribe(self, topic, callback):
+        with self._lock:
+            callbacks = self._subscribers.get(topic, ())
+            self._subscribers[topic] = tuple(c for c in callbacks if c != callback)
+    
+    def publish(self, topic, **payload):
+        for callback in self._subscribers.get(topic, ()):
+            try:
+                callback(**payload)
+            except Exception as e:
+                print(f"处理事件失败: {topic}, {e}")
+
+# 默认事件总线，BaseCrawler的状态变化和CrawlerManager的重新加载发布到这里
+EVENT_BUS = EventBus()
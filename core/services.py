@@ -0,0 +1,79 @@
+import os
+from core.crawler_manager import CrawlerManager
+from utils.scheduler_manager import SchedulerManager
+from utils.system_monitor import SystemMonitor
+from utils.api_server import ApiServer
+
+class CoreServices:
+    """
+    爬虫管理核心服务
+    
+    负责按顺序启动和停止系统监控、CrawlerManager、定时任务调度器和控制接口，
+    不依赖wxPython，图形界面和无界面守护进程（python -m crawlytools serve）共用。
+    """
+    def __init__(self, monitor=True, api_port=None):
+        """
+        Args:
+            monitor: 是否启动系统资源后台采样（界面的监控栏和曲线使用）
+            api_port: 控制接口端口，None时读取环境变量API_PORT，未设置则不启动控制接口
+        """
+        self.monitor = monitor
+        self.api_port = api_port if api_port is not None else os.environ.get("API_PORT")
+        self.system_monitor = None
+        self.crawler_manager = None
+        self.scheduler_manager = None
+        self.api_server = None
+    
+    def start_monitor(self):
+        """启动系统资源监控，可以先于其他服务调用以便界面尽早显示"""
+        if self.monitor and self.system_monitor is None:
+            self.system_monitor = SystemMonitor()
+            # 后台线程采样，读取方只获取最新快照
+            self.system_monitor.start()
+            print("SystemMonitor初始化成功")
+        return self.system_monitor
+    
+    def start(self, on_crawlers_changed=None):
+        """
+        启动全部服务
+        
+        Args:
+            on_crawlers_changed: crawlers目录变化并重新加载后以diff字典为参数调用，在监视线程中执行
+        """
+        self.start_monitor()
+        
+        self.crawler_manager = CrawlerManager()
+        if self.system_monitor is not None:
+            crawler_manager = self.crawler_manager
+            self.system_monitor.set_active_provider(lambda: crawler_manager.get_queue_stats()["active"])
+        print("CrawlerManager初始化成功")
+        
+        self.scheduler_manager = SchedulerManager(self.crawler_manager)
+        self.scheduler_manager.start()
+        # 启动时即从数据库加载定时任务，不依赖界面打开定时任务管理窗口
+        self.scheduler_manager.load_tasks()
+        print("调度器启动成功")
+        
+        # crawlers目录有变化时自动增量重新加载
+        self.crawler_manager.start_watching(callback=on_crawlers_changed)
+        
+        if self.api_port:
+            self.api_server = ApiServer(self.crawler_manager, port=int(self.api_port)).start()
+        return self
+    
+    def stop(self, wait=False):
+        """
+        停止全部服务
+        
+        Args:
+            wait: 是否等待运行中的爬虫线程结束
+        """
+        # 先停止控制接口和调度器，避免关闭过程中触发新的运行
+        if self.api_server:
+            self.api_server.stop()
+        if self.scheduler_manager:
+            self.scheduler_manager.stop()
+        if self.system_monitor:
+            self.system_monitor.stop()
+        if self.crawler_manager:
+            self.crawler_manager.shutdown(wait=wait)
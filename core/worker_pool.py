@@ -0,0 +1,139 @@
+import itertools
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+
+# 任务优先级，数值越小越先执行
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 5
+PRIORITY_LOW = 10
+
+class WorkerPool:
+    """有界工作线程池，任务按优先级排队，同优先级先进先出"""
+    # 计算平均等待时间时保留的最近样本数
+    wait_samples = 200
+
+    def __init__(self, max_workers=10, name="worker"):
+        self.name = name
+        self.max_workers = max(1, int(max_workers))
+        self._queue = queue.PriorityQueue()
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+        self._threads = []
+        # 已发出缩容退出信号、尚未退出的线程数
+        self._retiring = 0
+        self._active = 0
+        # 排队中的任务: seq -> 提交时间，用于统计当前最长等待
+        self._pending = {}
+        self._wait_times = deque(maxlen=self.wait_samples)
+        self._completed = 0
+        self._shutdown = False
+        self._adjust_workers()
+
+    def submit(self, fn, *args, priority=PRIORITY_NORMAL, **kwargs):
+        """提交任务，返回concurrent.futures.Future"""
+        future = Future()
+        with self._lock:
+            if self._shutdown:
+                raise RuntimeError("线程池已关闭")
+            seq = next(self._seq)
+            self._pending[seq] = time.time()
+        # 排队中被取消的任务立即从统计中移除
+        future.add_done_callback(lambda f: f.cancelled() and self._discard_pending(seq))
+        self._queue.put((priority, seq, future, fn, args, kwargs))
+        return future
+
+    def _discard_pending(self, seq):
+        with self._lock:
+            self._pending.pop(seq, None)
+
+    def _worker(self):
+        while True:
+            priority, seq, future, fn, args, kwargs = self._queue.get()
+            if fn is None:
+                with self._lock:
+                    # 关闭信号总是退出；缩容信号在之后的扩容中可能已被撤销，撤销后忽略
+                    if priority != float("-inf") or self._retiring > 0:
+                        if priority == float("-inf"):
+                            self._retiring -= 1
+                        self._threads.remove(threading.current_thread())
+                        return
+                continue
+            with self._lock:
+                submitted = self._pending.pop(seq, None)
+                if submitted is not None:
+                    self._wait_times.append(time.time() - submitted)
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._active += 1
+            try:
+                future.set_result(fn(*args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._active -= 1
+                    self._completed += 1
+
+    def _adjust_workers(self):
+        """按max_workers增减工作线程"""
+        with self._lock:
+            missing = self.max_workers - (len(self._threads) - self._retiring)
+            if missing > 0:
+                # 先撤销尚未执行的缩容，正在执行任务的线程继续保留
+                cancelled = min(missing, self._retiring)
+                self._retiring -= cancelled
+                missing -= cancelled
+            for _ in range(missing):
+                thread = threading.Thread(target=self._worker, name=f"{self.name}-{next(self._seq)}", daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            if missing < 0:
+                self._retiring += -missing
+        # 多余的线程在空闲时取到优先级最高的退出信号后结束
+        for _ in range(-missing):
+            self._queue.put((float("-inf"), next(self._seq), None, None, (), {}))
+
+    def resize(self, max_workers):
+        """调整最大并发数"""
+        self.max_workers = max(1, int(max_workers))
+        self._adjust_workers()
+
+    def get_stats(self):
+        """获取线程池状态：活动数、排队数和等待时间（秒）"""
+        now = time.time()
+        with self._lock:
+            waits = list(self._wait_times)
+            oldest = min(self._pending.values()) if self._pending else None
+            return {
+                "max_workers": self.max_workers,
+                "active": self._active,
+                "queued": len(self._pending),
+                "completed": self._completed,
+                "avg_wait": round(sum(waits) / len(waits), 3) if waits else 0.0,
+                "max_wait": round(max(waits), 3) if waits else 0.0,
+                "oldest_wait": round(now - oldest, 3) if oldest is not None else 0.0,
+            }
+
+    def shutdown(self, wait=False, cancel_futures=True):
+        """关闭线程池，默认取消所有排队中的任务"""
+        with self._lock:
+            self._shutdown = True
+            threads = list(self._threads)
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item[2] is not None:
+                    item[2].cancel()
+        # 退出信号排在所有剩余任务之后
+        for _ in threads:
+            self._queue.put((float("inf"), next(self._seq), None, None, (), {}))
+        if wait:
+            for thread in threads:
+                thread.join()
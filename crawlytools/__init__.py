@@ -0,0 +1,5 @@
+"""
+爬虫管理系统命令行入口
+
+    python -m crawlytools serve    无界面运行爬虫管理、定时调度和数据库服务
+"""
@@ -0,0 +1,81 @@
+"""
+无界面守护进程入口，不导入wxPython
+
+用法:
+    python -m crawlytools serve [--monitor] [--api-port PORT] [--max-workers N]
+    python -m crawlytools vacuum
+
+收到SIGTERM或SIGINT（Ctrl+C）后停止调度器和所有爬虫、写完排队中的数据库和日志后退出，
+可以直接作为systemd服务运行。
+vacuum 将旧数据库转换为增量回收模式，之后数据清理释放的空间会归还给文件系统。
+"""
+import argparse
+import os
+import signal
+import sys
+import threading
+
+# 以 python -m crawlytools 运行时保证能导入同级的core和utils
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.services import CoreServices
+
+
+def serve(args):
+    services = CoreServices(monitor=args.monitor, api_port=args.api_port)
+    stop_event = threading.Event()
+
+    def handle_signal(signum, frame):
+        print(f"收到信号 {signum}，正在停止服务...")
+        stop_event.set()
+
+    signal.signal(signal.SIGINT, handle_signal)
+    signal.signal(signal.SIGTERM, handle_signal)
+
+    services.start()
+    if args.max_workers:
+        services.crawler_manager.set_max_workers(args.max_workers)
+    print(f"服务已启动，已加载 {len(services.crawler_manager.get_crawlers())} 个爬虫，进程号 {os.getpid()}")
+    try:
+        # 定时唤醒，Windows下Event.wait不会被信号打断
+        while not stop_event.wait(1):
+            pass
+    finally:
+        services.stop(wait=True)
+        print("服务已停止")
+    return 0
+
+
+def vacuum(args):
+    from core.db_manager import DBManager
+    from core.db_retention import RetentionManager
+
+    db_manager = DBManager(async_writes=False)
+    print(f"正在转换数据库 {db_manager.db_file}，请确认没有正在运行的爬虫管理程序...")
+    if RetentionManager(db_manager).enable_incremental_vacuum():
+        print("数据库已切换为增量回收模式")
+    else:
+        print("数据库已是增量回收模式，无需转换")
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="crawlytools", description="爬虫管理系统")
+    subparsers = parser.add_subparsers(dest="command")
+    serve_parser = subparsers.add_parser("serve", help="无界面运行爬虫管理和定时调度")
+    serve_parser.add_argument("--monitor", action="store_true", help="启动系统资源后台采样")
+    serve_parser.add_argument("--api-port", type=int, default=None, help="控制接口端口，默认读取API_PORT，不设置则不启动")
+    serve_parser.add_argument("--max-workers", type=int, default=None, help="最大并发爬虫数，默认读取MAX_CRAWLERS")
+    subparsers.add_parser("vacuum", help="执行一次VACUUM，将旧数据库切换为增量回收模式（需停止其他实例）")
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        return serve(args)
+    if args.command == "vacuum":
+        return vacuum(args)
+    parser.print_help()
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
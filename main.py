@@ -5,11 +5,29 @@ import threading
 import os
 import shutil
 import json
-from core.crawler_manager import CrawlerManager
-from utils.system_monitor import SystemMonitor
-from utils.scheduler_manager import SchedulerManager
+from core.services import CoreServices
+from core.event_bus import CRAWLER_STATUS
+from core.worker_pool import PRIORITY_HIGH
+from utils.task_list_model import TaskListModel
+from utils.task_executor import TaskExecutor
+
+# 界面辅助操作（读取日志、加载和保存定时任务等）共用的后台执行器
+gui_executor = TaskExecutor(name="gui")
 
 class CrawlerGUI(wx.Frame):
+    # 监控曲线：(标题, 指标, 固定最大值, 单位)
+    CHARTS = [
+        ("CPU", ["cpu"], 100, "%"),
+        ("内存", ["memory"], 100, "%"),
+        ("磁盘读/写", ["disk_read", "disk_write"], None, "B/s"),
+        ("网络收/发", ["net_recv", "net_sent"], None, "B/s"),
+        ("运行爬虫", ["active_crawlers"], None, ""),
+    ]
+    # 任务列表的状态过滤选项
+    STATUS_FILTERS = ["全部状态", "未运行", "排队中", "运行中", "完成", "失败"]
+    # 全量核对任务列表的间隔（秒），平时只按状态事件刷新变化的行
+    reconcile_interval = 10
+    
     def __init__(self):
         super().__init__(None, title="爬虫管理系统", size=(1200, 800))
         
@@ -17,6 +35,7 @@ class CrawlerGUI(wx.Frame):
         self.init_ui()
         
         # 然后在后台线程中进行其他初始化操作
+        self.services = CoreServices()
         self.crawler_manager = None
         self.system_monitor = None
         self.scheduler_manager = None
@@ -33,19 +52,17 @@ class CrawlerGUI(wx.Frame):
         print("开始后台初始化...")
         try:
             # 先初始化系统资源监控（确保优先可用）
-            self.system_monitor = SystemMonitor()  # 初始化系统资源监控
-            print("SystemMonitor初始化成功")
-            
-            # 然后初始化CrawlerManager
-            self.crawler_manager = CrawlerManager()
-            print("CrawlerManager初始化成功")
+            self.system_monitor = self.services.start_monitor()
             
-            # 初始化调度器
-            print("开始初始化调度器...")
-            self.scheduler_manager = SchedulerManager(self.crawler_manager)
-            print("调度器实例创建成功")
-            self.scheduler_manager.start()
-            print("调度器启动成功")
+            # 然后启动CrawlerManager和调度器，与无界面模式共用同一套核心服务
+            self.services.start(
+                # crawlers目录有变化时自动增量重新加载
+                on_crawlers_changed=lambda diff: wx.CallAfter(self.apply_crawler_diff, diff)
+            )
+            self.crawler_manager = self.services.crawler_manager
+            self.scheduler_manager = self.services.scheduler_manager
+            # 爬虫状态变化时只刷新对应的行
+            self.crawler_manager.event_bus.subscribe(CRAWLER_STATUS, self.on_crawler_status_event)
             
             # 更新任务列表
             wx.CallAfter(self.update_task_list)
@@ -68,6 +85,7 @@ class CrawlerGUI(wx.Frame):
         self.schedule_btn = wx.Button(panel, label="定时设置")
         self.reload_btn = wx.Button(panel, label="重新加载模块")
         self.import_btn = wx.Button(panel, label="导入爬虫模块")
+        self.search_log_btn = wx.Button(panel, label="搜索日志")
         
         button_sizer.Add(self.run_btn, 0, wx.ALL, 5)
         button_sizer.Add(self.stop_btn, 0, wx.ALL, 5)
@@ -75,6 +93,7 @@ class CrawlerGUI(wx.Frame):
         button_sizer.Add(self.schedule_btn, 0, wx.ALL, 5)
         button_sizer.Add(self.reload_btn, 0, wx.ALL, 5)
         button_sizer.Add(self.import_btn, 0, wx.ALL, 5)
+        button_sizer.Add(self.search_log_btn, 0, wx.ALL, 5)
         
         main_sizer.Add(button_sizer, 0, wx.EXPAND | wx.ALL, 5)
         
@@ -83,6 +102,18 @@ class CrawlerGUI(wx.Frame):
         self.system_info_text.SetFont(wx.Font(10, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_BOLD))
         main_sizer.Add(self.system_info_text, 0, wx.EXPAND | wx.ALL, 5)
         
+        # 系统指标历史曲线
+        chart_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.chart_tier_choice = wx.Choice(panel, choices=["1秒", "1分钟", "1小时"])
+        self.chart_tier_choice.SetSelection(0)
+        chart_sizer.Add(self.chart_tier_choice, 0, wx.ALIGN_CENTER_VERTICAL | wx.ALL, 5)
+        self.charts = []
+        for title, metrics, fixed_max, unit in self.CHARTS:
+            chart = SparklinePanel(panel, title, fixed_max, unit)
+            chart_sizer.Add(chart, 1, wx.EXPAND | wx.ALL, 2)
+            self.charts.append((chart, metrics))
+        main_sizer.Add(chart_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT, 5)
+        
         # 中间分割窗口
         splitter = wx.SplitterWindow(panel, style=wx.SP_3D)
         
@@ -90,11 +121,29 @@ class CrawlerGUI(wx.Frame):
         left_panel = wx.Panel(splitter)
         left_sizer = wx.BoxSizer(wx.VERTICAL)
         
-        self.task_list = wx.ListCtrl(left_panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL)
+        # 任务过滤
+        filter_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.task_filter_text = wx.SearchCtrl(left_panel)
+        self.task_filter_text.ShowCancelButton(True)
+        self.task_filter_text.SetDescriptiveText("按任务名过滤")
+        filter_sizer.Add(self.task_filter_text, 1, wx.EXPAND | wx.ALL, 2)
+        self.task_status_choice = wx.Choice(left_panel, choices=self.STATUS_FILTERS)
+        self.task_status_choice.SetSelection(0)
+        filter_sizer.Add(self.task_status_choice, 0, wx.ALL, 2)
+        left_sizer.Add(filter_sizer, 0, wx.EXPAND | wx.LEFT | wx.RIGHT | wx.TOP, 3)
+        
+        # 虚拟列表，数据保存在模型中，只绘制可见行
+        self.task_model = TaskListModel(8, numeric_columns=(4, 5, 6))
+        self.task_list = TaskListCtrl(left_panel, self.task_model)
         self.task_list.InsertColumn(0, "任务名", width=150)
         self.task_list.InsertColumn(1, "状态", width=100)
         self.task_list.InsertColumn(2, "上次运行时间", width=150)
         self.task_list.InsertColumn(3, "参数", width=300)
+        # 运行中为实时值，否则为最近一次运行的统计
+        self.task_list.InsertColumn(4, "CPU(秒)", width=70)
+        self.task_list.InsertColumn(5, "内存峰值(MB)", width=90)
+        self.task_list.InsertColumn(6, "读/写(MB)", width=100)
+        self.task_list.InsertColumn(7, "句柄/线程", width=80)
         
         left_sizer.Add(self.task_list, 1, wx.EXPAND | wx.ALL, 5)
         left_panel.SetSizer(left_sizer)
@@ -142,51 +191,150 @@ class CrawlerGUI(wx.Frame):
         self.Bind(wx.EVT_BUTTON, self.on_schedule, self.schedule_btn)
         self.Bind(wx.EVT_BUTTON, self.on_reload, self.reload_btn)
         self.Bind(wx.EVT_BUTTON, self.on_import, self.import_btn)
+        self.Bind(wx.EVT_BUTTON, self.on_search_logs, self.search_log_btn)
         self.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_task_selected, self.task_list)
         self.Bind(wx.EVT_LIST_ITEM_ACTIVATED, self.on_task_double_clicked, self.task_list)  # 双击事件
         self.task_list.Bind(wx.EVT_CONTEXT_MENU, self.on_task_right_clicked)  # 右键菜单事件
+        self.Bind(wx.EVT_LIST_COL_CLICK, self.on_task_column_click, self.task_list)
+        self.Bind(wx.EVT_TEXT, self.on_task_filter, self.task_filter_text)
+        self.Bind(wx.EVT_SEARCHCTRL_CANCEL_BTN, lambda e: self.task_filter_text.SetValue(""), self.task_filter_text)
+        self.Bind(wx.EVT_CHOICE, self.on_task_filter, self.task_status_choice)
     
     def update_task_list(self):
-        self.task_list.DeleteAllItems()
+        """用所有爬虫重建任务列表模型，虚拟列表只重绘可见行"""
         crawlers = self.crawler_manager.get_crawlers()
-        for task_name, crawler in crawlers.items():
-            index = self.task_list.InsertItem(self.task_list.GetItemCount(), task_name)
-            self.task_list.SetItem(index, 1, crawler.status)
-            self.task_list.SetItem(index, 2, crawler.last_run_time or "-")
-            params = self.task_params.get(task_name, "")
-            # 显示参数的简要信息，过长时截断
-            display_params = params[:50] + "..." if len(params) > 50 else params
-            self.task_list.SetItem(index, 3, display_params)
+        self.task_model.set_rows({
+            task_name: self.task_row_values(task_name, crawler) for task_name, crawler in crawlers.items()
+        })
+        self.task_list.refresh_all()
+    
+    def task_row_values(self, task_name, crawler):
+        """任务列表中一行各列的显示文本"""
+        params = self.task_params.get(task_name, "")
+        # 显示参数的简要信息，过长时截断
+        display_params = params[:50] + "..." if len(params) > 50 else params
+        resources = crawler.get_resource_usage() or {}
+        mb = 1024 * 1024
+        cpu = resources.get("cpu_seconds")
+        peak_rss = resources.get("peak_rss")
+        read_bytes = resources.get("read_bytes")
+        write_bytes = resources.get("write_bytes")
+        fds = resources.get("num_fds" if crawler.running else "max_fds")
+        threads = resources.get("num_threads" if crawler.running else "max_threads")
+        return (
+            task_name,
+            crawler.status,
+            crawler.last_run_time or "-",
+            display_params,
+            f"{cpu:.1f}" if cpu is not None else "-",
+            f"{peak_rss / mb:.1f}" if peak_rss is not None else "-",
+            f"{read_bytes / mb:.1f}/{write_bytes / mb:.1f}" if read_bytes is not None else "-",
+            f"{fds}/{threads}" if fds is not None else "-",
+        )
+    
+    def refresh_tasks(self, task_names):
+        """
+        按任务名刷新若干行：只更新模型，内容有变化的可见行才重绘，
+        排序列或过滤的状态变化时重新计算可见行
+        """
+        crawlers = self.crawler_manager.get_crawlers()
+        reorder = False
+        changed_rows = []
+        for task_name in task_names:
+            crawler = crawlers.get(task_name)
+            if crawler is None:
+                continue
+            changed, needs_reorder = self.task_model.update(task_name, self.task_row_values(task_name, crawler))
+            reorder = reorder or needs_reorder
+            if changed:
+                changed_rows.append(task_name)
+        if reorder:
+            self.task_model.apply()
+            self.task_list.refresh_all()
+        else:
+            for task_name in changed_rows:
+                self.task_list.refresh_task(task_name)
+    
+    def on_crawler_status_event(self, task_name, status, old_status):
+        """事件总线回调，在爬虫线程中执行：记录变化的任务，合并后在界面线程中刷新"""
+        with self.pending_rows_lock:
+            self.pending_rows.add(task_name)
+            if self.pending_rows_scheduled:
+                return
+            self.pending_rows_scheduled = True
+        wx.CallAfter(self.flush_pending_rows)
+    
+    def flush_pending_rows(self):
+        with self.pending_rows_lock:
+            task_names = self.pending_rows
+            self.pending_rows = set()
+            self.pending_rows_scheduled = False
+        if self.crawler_manager:
+            self.refresh_tasks(task_names)
+    
+    def apply_crawler_diff(self, diff):
+        """按重新加载的差异更新任务列表模型"""
+        for task_name in diff["removed"]:
+            self.task_model.remove(task_name)
+        self.task_model.apply()
+        self.refresh_tasks(diff["added"] + diff["changed"])
+        self.task_list.refresh_all()
+    
+    def on_task_filter(self, event):
+        """按任务名和状态过滤任务列表"""
+        status = self.task_status_choice.GetStringSelection()
+        self.task_model.set_filter(self.task_filter_text.GetValue(), None if status == "全部状态" else status)
+        self.task_list.refresh_all()
+    
+    def on_task_column_click(self, event):
+        """点击列标题排序，再次点击切换升降序"""
+        self.task_model.sort(event.GetColumn())
+        self.task_list.refresh_all()
     
     def update_status(self, event):
-        """更新任务状态和系统资源信息"""
+        """更新系统资源信息和运行中任务的资源占用，任务状态由事件驱动刷新"""
         # 更新系统资源监控信息（独立于crawler_manager状态）
         if self.system_monitor:
             system_info = self.system_monitor.get_system_info_string()
+            if self.crawler_manager:
+                stats = self.crawler_manager.get_queue_stats()
+                system_info += f" | 爬虫: 运行 {stats['active']}/{stats['max_workers']}，排队 {stats['queued']}（最长等待 {stats['oldest_wait']:.0f}s）"
             self.system_info_text.SetLabel(f"系统资源监控: {system_info}")
+            self.update_charts()
         
         # 更新任务状态（需要crawler_manager）
         if self.crawler_manager:
-            # 更新任务列表
-            crawlers = self.crawler_manager.get_crawlers()
-            for i in range(self.task_list.GetItemCount()):
-                task_name = self.task_list.GetItem(i, 0).GetText()
-                crawler = crawlers.get(task_name)
-                if crawler:
-                    self.task_list.SetItem(i, 1, crawler.status)
-                    self.task_list.SetItem(i, 2, crawler.last_run_time or "-")
+            now = time.time()
+            if now - self.last_reconcile_time >= self.reconcile_interval:
+                # 低频全量核对，兜底处理没有发布事件的状态变化
+                self.last_reconcile_time = now
+                self.refresh_tasks(list(self.task_model.rows))
+            else:
+                # 只有运行中任务的资源占用会持续变化，上一轮运行中的任务再刷新一次最终统计
+                active = {
+                    task_name for task_name, crawler_run in list(self.crawler_manager.runs.items())
+                    if not crawler_run.is_done()
+                }
+                self.refresh_tasks(active | self.last_active_rows)
+                self.last_active_rows = active
             
             # 更新当前选中任务的日志和错误信息
-            selected = self.task_list.GetFirstSelected()
-            if selected != -1:
-                task_name = self.task_list.GetItem(selected, 0).GetText()
+            task_name = self.task_list.get_selected_task()
+            if task_name:
                 self.update_logs(task_name)
     
+    def update_charts(self):
+        """用选中精度的历史数据刷新监控曲线"""
+        tier = self.chart_tier_choice.GetSelection()
+        history = self.system_monitor.history
+        for chart, metrics in self.charts:
+            limit = max(10, chart.GetClientSize().width // 2)
+            chart.set_data([history.get_series(metric, tier, limit)[1] for metric in metrics])
+    
     def on_run(self, event):
         """运行选中任务"""
-        selected = self.task_list.GetFirstSelected()
-        if selected != -1:
-            task_name = self.task_list.GetItem(selected, 0).GetText()
+        task_name = self.task_list.get_selected_task()
+        if task_name:
             # 获取任务特定参数
             params_text = self.task_params.get(task_name, "").strip()
             params = {}
@@ -220,16 +368,16 @@ class CrawlerGUI(wx.Frame):
                     wx.MessageBox("参数格式错误，支持格式：\n1. key1=value1,key2=value2\n2. --env ly --debug\n3. {\"key\": \"value\"}", "错误", wx.OK | wx.ICON_ERROR)
                     return
             
-            if self.crawler_manager.run_crawler(task_name, params):
+            # 手动运行的任务优先于定时任务出队
+            if self.crawler_manager.run_crawler(task_name, params, priority=PRIORITY_HIGH):
                 wx.MessageBox(f"任务 {task_name} 已启动", "提示", wx.OK | wx.ICON_INFORMATION)
             else:
                 wx.MessageBox(f"任务 {task_name} 启动失败，可能正在运行", "错误", wx.OK | wx.ICON_ERROR)
     
     def on_stop(self, event):
         """停止选中任务"""
-        selected = self.task_list.GetFirstSelected()
-        if selected != -1:
-            task_name = self.task_list.GetItem(selected, 0).GetText()
+        task_name = self.task_list.get_selected_task()
+        if task_name:
             if self.crawler_manager.stop_crawler(task_name):
                 wx.MessageBox(f"任务 {task_name} 已停止", "提示", wx.OK | wx.ICON_INFORMATION)
             else:
@@ -237,9 +385,12 @@ class CrawlerGUI(wx.Frame):
     
     def on_reload(self, event):
         """重新加载模块"""
-        self.crawler_manager.reload_crawlers()
-        self.update_task_list()
-        wx.MessageBox("模块已重新加载", "提示", wx.OK | wx.ICON_INFORMATION)
+        diff = self.crawler_manager.reload_crawlers()
+        self.apply_crawler_diff(diff)
+        message = f"模块已重新加载\n新增: {len(diff['added'])}，删除: {len(diff['removed'])}，更新: {len(diff['changed'])}"
+        if diff["skipped"]:
+            message += f"\n以下任务正在运行，将在结束后重新加载: {', '.join(diff['skipped'])}"
+        wx.MessageBox(message, "提示", wx.OK | wx.ICON_INFORMATION)
     
     def on_import(self, event):
         """导入爬虫模块或项目"""
@@ -285,8 +436,9 @@ class CrawlerGUI(wx.Frame):
     
     def on_task_selected(self, event):
         """选中任务时更新日志和错误信息"""
-        task_name = event.GetItem().GetText()
-        self.update_logs(task_name)
+        task_name = self.task_model.task_at(event.GetIndex())
+        if task_name:
+            self.update_logs(task_name)
         
     def validate_python_file(self, file_path):
         """验证Python文件的有效性"""
@@ -361,8 +513,7 @@ class CrawlerGUI(wx.Frame):
                     }, f)
                 
                 # 重新加载模块
-                self.crawler_manager.reload_crawlers()
-                self.update_task_list()
+                self.apply_crawler_diff(self.crawler_manager.reload_crawlers())
                 wx.MessageBox("爬虫模块导入成功", "提示", wx.OK | wx.ICON_INFORMATION)
             except Exception as e:
                 wx.MessageBox(f"导入失败: {e}", "错误", wx.OK | wx.ICON_ERROR)
@@ -434,8 +585,7 @@ class CrawlerGUI(wx.Frame):
                         }, f)
                 
                 # 重新加载模块
-                self.crawler_manager.reload_crawlers()
-                self.update_task_list()
+                self.apply_crawler_diff(self.crawler_manager.reload_crawlers())
                 
                 wx.MessageBox(f"项目 {project_name} 导入成功！", "提示", wx.OK | wx.ICON_INFORMATION)
                     
@@ -540,8 +690,7 @@ class CrawlerGUI(wx.Frame):
                     }, f)
                 
                 # 重新加载模块
-                self.crawler_manager.reload_crawlers()
-                self.update_task_list()
+                self.apply_crawler_diff(self.crawler_manager.reload_crawlers())
                 
                 wx.MessageBox(f"项目 {project_name} 导入成功！", "提示", wx.OK | wx.ICON_INFORMATION)
                     
@@ -563,7 +712,7 @@ class CrawlerGUI(wx.Frame):
             stop_menu = menu.Append(wx.ID_ANY, "停止任务")
             
             # 获取任务名
-            task_name = self.task_list.GetItem(item, 0).GetText()
+            task_name = self.task_model.task_at(item)
             
             # 绑定事件
             self.Bind(wx.EVT_MENU, lambda e: self.on_edit_params(task_name), edit_params_menu)
@@ -576,8 +725,9 @@ class CrawlerGUI(wx.Frame):
     
     def on_task_double_clicked(self, event):
         """双击任务时编辑参数"""
-        task_name = event.GetItem().GetText()
-        self.on_edit_params(task_name)
+        task_name = self.task_model.task_at(event.GetIndex())
+        if task_name:
+            self.on_edit_params(task_name)
     
     def on_edit_params(self, task_name):
         """编辑任务参数"""
@@ -617,17 +767,14 @@ class CrawlerGUI(wx.Frame):
             new_params = param_text.GetValue()
             self.task_params[task_name] = new_params
             # 更新任务列表中的参数显示
-            self.update_task_list()
+            self.refresh_tasks([task_name])
         
         dialog.Destroy()
     
     def on_run_task_from_menu(self, task_name):
         """从右键菜单运行任务"""
         # 设置选中项
-        for i in range(self.task_list.GetItemCount()):
-            if self.task_list.GetItem(i, 0).GetText() == task_name:
-                self.task_list.Select(i)
-                break
+        self.task_list.select_task(task_name)
         # 调用运行函数
         self.on_run(None)
     
@@ -653,29 +800,54 @@ class CrawlerGUI(wx.Frame):
         self.last_log_update_time = current_time
         self.log_update_requested = False
         
+        # 上一次读取尚未应用到界面时跳过，避免游标被重复读取
+        if self.log_fetching:
+            return
+        self.log_fetching = True
+        # 切换任务后重新加载尾部，否则只读取游标之后的新增内容
+        cursor = self.log_cursor if self.log_cursor_task == task_name else None
+        
         # 在后台线程中获取日志内容，避免阻塞主线程
         def get_logs_in_background():
             try:
-                # 只获取最新的200行日志，避免内存占用过大
-                logs = self.crawler_manager.log_manager.get_log_content(task_name, max_lines=200)
+                log_manager = self.crawler_manager.log_manager
+                if cursor is None:
+                    # 首次只加载最新的200行日志，避免内存占用过大
+                    logs, new_cursor = log_manager.open_tail(task_name, max_lines=200)
+                else:
+                    logs, new_cursor = log_manager.read_tail(task_name, cursor)
                 crawler = self.crawler_manager.get_crawler(task_name)
                 error_info = crawler.error_info if (crawler and crawler.error_info) else ""
-                
-                # 确保当前任务仍是选中的任务
-                if self.current_log_task == task_name:
-                    wx.CallAfter(self.update_logs_ui, logs, error_info)
+                wx.CallAfter(self.update_logs_ui, task_name, logs, new_cursor, cursor is None, error_info)
             except Exception as e:
+                self.log_fetching = False
                 print(f"获取日志内容失败: {e}")
         
-        threading.Thread(target=get_logs_in_background, daemon=True).start()
+        # 同一时间只保留最新的一个日志读取请求
+        gui_executor.submit(get_logs_in_background, key="logs")
     
-    def update_logs_ui(self, logs, error_info):
-        """在主线程中更新日志UI"""
-        self.log_text.SetValue(logs)
-        # 滚动到底部
-        self.log_text.SetInsertionPointEnd()
-        
-        self.error_text.SetValue(error_info)
+    def update_logs_ui(self, task_name, logs, cursor, replace, error_info):
+        """在主线程中更新日志UI，replace为False时只追加新增内容"""
+        self.log_fetching = False
+        # 确保当前任务仍是选中的任务
+        if self.current_log_task != task_name:
+            return
+        self.log_cursor_task = task_name
+        self.log_cursor = cursor
+        if replace:
+            self.log_text.SetValue(logs)
+        elif logs:
+            self.log_text.AppendText(logs)
+            # 超过上限时删除最早的内容
+            length = self.log_text.GetLastPosition()
+            if length > self.max_log_chars:
+                self.log_text.Remove(0, length - self.max_log_chars)
+        if replace or logs:
+            # 滚动到底部
+            self.log_text.SetInsertionPointEnd()
+        
+        if self.error_text.GetValue() != error_info:
+            self.error_text.SetValue(error_info)
     
     def __init__(self):
         super().__init__(None, title="爬虫管理系统", size=(1000, 700))
@@ -684,6 +856,7 @@ class CrawlerGUI(wx.Frame):
         self.init_ui()
         
         # 然后在后台线程中进行其他初始化操作
+        self.services = CoreServices()
         self.crawler_manager = None
         self.system_monitor = None
         self.scheduler_manager = None
@@ -693,9 +866,20 @@ class CrawlerGUI(wx.Frame):
         self.log_update_interval = 1000  # 1秒更新一次日志
         self.log_update_requested = False
         self.current_log_task = None
+        # 日志增量读取游标
+        self.log_cursor = None
+        self.log_cursor_task = None
+        self.log_fetching = False
+        self.max_log_chars = 200000  # 日志框最多保留的字符数
         
         # 存储每个任务的参数
         self.task_params = {}
+        # 收到状态事件、等待界面线程刷新的任务
+        self.pending_rows = set()
+        self.pending_rows_lock = threading.Lock()
+        self.pending_rows_scheduled = False
+        self.last_reconcile_time = 0
+        self.last_active_rows = set()
         
         self.update_timer = wx.Timer(self)
         self.Bind(wx.EVT_TIMER, self.update_status, self.update_timer)
@@ -706,13 +890,13 @@ class CrawlerGUI(wx.Frame):
     
     def on_clear_log(self, event):
         """清空当前选中任务的日志"""
-        selected = self.task_list.GetFirstSelected()
-        if selected != -1:
-            task_name = self.task_list.GetItem(selected, 0).GetText()
+        task_name = self.task_list.get_selected_task()
+        if task_name:
             # 清空日志文件
             self.crawler_manager.log_manager.clear_log(task_name)
-            # 更新日志显示
+            # 更新日志显示，下次刷新时重新加载
             self.log_text.SetValue("")
+            self.log_cursor_task = None
             wx.MessageBox(f"已清空 {task_name} 的日志", "提示", wx.OK | wx.ICON_INFORMATION)
         else:
             wx.MessageBox("请先选中一个任务", "提示", wx.OK | wx.ICON_INFORMATION)
@@ -722,10 +906,7 @@ class CrawlerGUI(wx.Frame):
     def on_schedule(self, event):
         """显示统一的定时任务管理对话框"""
         # 获取选中的任务名（如果有）
-        selected = self.task_list.GetFirstSelected()
-        selected_task = None
-        if selected != -1:
-            selected_task = self.task_list.GetItem(selected, 0).GetText()
+        selected_task = self.task_list.get_selected_task()
         
         # 显示统一的定时任务管理对话框，即使调度器尚未初始化
         # 对话框内部会处理调度器初始化
@@ -735,17 +916,136 @@ class CrawlerGUI(wx.Frame):
     
 
     
+    def on_search_logs(self, event):
+        """显示日志搜索对话框，默认检索选中的任务"""
+        if not self.crawler_manager:
+            wx.MessageBox("系统正在初始化，请稍后再试", "提示", wx.OK | wx.ICON_INFORMATION)
+            return
+        selected_task = self.task_list.get_selected_task()
+        dialog = LogSearchDialog(self, self.crawler_manager, selected_task)
+        dialog.ShowModal()
+        dialog.Destroy()
+    
     def on_close(self, event):
         """关闭窗口时停止所有爬虫和调度器"""
-        # 停止所有爬虫
         if self.crawler_manager:
-            for crawler in self.crawler_manager.get_crawlers().values():
-                crawler.stop()
-        # 停止调度器
-        if self.scheduler_manager:
-            self.scheduler_manager.stop()
+            self.crawler_manager.event_bus.unsubscribe(CRAWLER_STATUS, self.on_crawler_status_event)
+        self.services.stop()
+        gui_executor.shutdown()
         self.Destroy()
 
+class TaskListCtrl(wx.ListCtrl):
+    """任务列表虚拟控件，按行号从TaskListModel读取文本，只绘制可见行"""
+    def __init__(self, parent, model):
+        super().__init__(parent, style=wx.LC_REPORT | wx.LC_VIRTUAL | wx.LC_SINGLE_SEL)
+        self.model = model
+        self.selected_task = None
+        self.Bind(wx.EVT_LIST_ITEM_SELECTED, self.on_item_selected)
+        self.Bind(wx.EVT_LIST_ITEM_DESELECTED, self.on_item_deselected)
+    
+    def OnGetItemText(self, item, column):
+        return self.model.get_text(item, column)
+    
+    def on_item_selected(self, event):
+        self.selected_task = self.model.task_at(event.GetIndex())
+        event.Skip()
+    
+    def on_item_deselected(self, event):
+        self.selected_task = None
+        event.Skip()
+    
+    def get_selected_task(self):
+        """选中行的任务名，没有选中时返回None"""
+        if self.GetFirstSelected() == -1:
+            return None
+        return self.selected_task
+    
+    def select_task(self, task_name):
+        index = self.model.index_of(task_name)
+        if index != -1:
+            self.Select(index)
+            self.EnsureVisible(index)
+        return index
+    
+    def refresh_task(self, task_name):
+        """重绘单个任务所在的行，不可见时不做任何操作"""
+        index = self.model.index_of(task_name)
+        if index != -1:
+            self.RefreshItem(index)
+    
+    def refresh_all(self):
+        """模型的行数或顺序变化后调用，按任务名保持选中项"""
+        selected_task = self.get_selected_task()
+        selected = self.GetFirstSelected()
+        self.SetItemCount(len(self.model))
+        index = self.model.index_of(selected_task) if selected_task else -1
+        if index != selected:
+            # 虚拟列表的选中状态按行号保存，行顺序变化后需要移动
+            if selected != -1:
+                self.Select(selected, False)
+            if index != -1:
+                self.Select(index)
+        self.selected_task = selected_task if index != -1 else None
+        self.Refresh()
+
+class SparklinePanel(wx.Panel):
+    """迷你折线图，显示一个或多个指标的历史数据及最新值"""
+    COLORS = [wx.Colour(30, 120, 220), wx.Colour(230, 120, 30)]
+    
+    def __init__(self, parent, title, fixed_max=None, unit=""):
+        super().__init__(parent, size=(-1, 50))
+        self.title = title
+        self.fixed_max = fixed_max
+        self.unit = unit
+        self.data = []
+        self.SetBackgroundStyle(wx.BG_STYLE_PAINT)
+        self.Bind(wx.EVT_PAINT, self.on_paint)
+        self.Bind(wx.EVT_SIZE, lambda event: self.Refresh())
+    
+    def set_data(self, data):
+        """data为每个指标的数值列表"""
+        self.data = data
+        self.Refresh()
+    
+    def format_value(self, value):
+        if self.unit == "B/s":
+            for unit in ("B/s", "KB/s", "MB/s", "GB/s"):
+                if value < 1024:
+                    return f"{value:.0f}{unit}"
+                value /= 1024
+            return f"{value:.0f}TB/s"
+        return f"{value:.1f}{self.unit}" if self.unit else f"{value:.0f}"
+    
+    def on_paint(self, event):
+        dc = wx.AutoBufferedPaintDC(self)
+        dc.SetBackground(wx.Brush(wx.Colour(250, 250, 250)))
+        dc.Clear()
+        width, height = self.GetClientSize()
+        dc.SetPen(wx.Pen(wx.Colour(210, 210, 210)))
+        dc.SetBrush(wx.TRANSPARENT_BRUSH)
+        dc.DrawRectangle(0, 0, width, height)
+        
+        top = 16
+        max_value = self.fixed_max or max([max(values) for values in self.data if values] + [1])
+        latest = []
+        for i, values in enumerate(self.data):
+            if not values:
+                continue
+            latest.append(self.format_value(values[-1]))
+            if len(values) < 2:
+                continue
+            step = (width - 4) / (len(values) - 1)
+            points = [
+                wx.Point(int(2 + j * step), int(height - 2 - (height - top - 4) * min(value, max_value) / max_value))
+                for j, value in enumerate(values)
+            ]
+            dc.SetPen(wx.Pen(self.COLORS[i % len(self.COLORS)], 1))
+            dc.DrawLines(points)
+        
+        dc.SetFont(wx.Font(8, wx.FONTFAMILY_DEFAULT, wx.FONTSTYLE_NORMAL, wx.FONTWEIGHT_NORMAL))
+        dc.SetTextForeground(wx.Colour(80, 80, 80))
+        dc.DrawText(f"{self.title} {'/'.join(latest)}", 4, 2)
+
 class ScheduleManagementDialog(wx.Dialog):
     """统一的定时任务管理对话框"""
     def __init__(self, parent, scheduler_manager, crawler_manager, selected_task=None):
@@ -765,7 +1065,7 @@ class ScheduleManagementDialog(wx.Dialog):
         self.schedule_list.SetItem(0, 5, "")
         
         # 在后台线程中初始化调度器和刷新任务列表
-        threading.Thread(target=self.init_scheduler_and_refresh, daemon=True).start()
+        gui_executor.submit(self.init_scheduler_and_refresh)
     
     def init_scheduler_and_refresh(self):
         """在后台线程中初始化调度器和刷新任务列表"""
@@ -892,7 +1192,7 @@ class ScheduleManagementDialog(wx.Dialog):
         """刷新定时任务列表（在主线程中执行）"""
         if tasks is None:
             # 如果没有提供任务数据，在后台线程中获取
-            threading.Thread(target=self.refresh_task_list_in_background, daemon=True).start()
+            gui_executor.submit(self.refresh_task_list_in_background, key="schedule-list")
             return
         
         # 清空列表
@@ -958,9 +1258,9 @@ class ScheduleManagementDialog(wx.Dialog):
             schedule_dlg = ScheduleDialog(self, selected_task, self.scheduler_manager, self.db_manager)
             if schedule_dlg.ShowModal() == wx.ID_OK:
                 # 刷新任务列表
-                self.refresh_task_list_in_background()
+                gui_executor.submit(self.refresh_task_list_in_background, key="schedule-list")
                 # 刷新调度器，确保新添加的任务被正确加载
-                threading.Thread(target=self.refresh_scheduler, daemon=True).start()
+                gui_executor.submit(self.refresh_scheduler, key="scheduler-refresh")
             schedule_dlg.Destroy()
         else:
             dlg.Destroy()
@@ -975,9 +1275,9 @@ class ScheduleManagementDialog(wx.Dialog):
             schedule_dlg = ScheduleDialog(self, task_name, self.scheduler_manager, self.db_manager)
             if schedule_dlg.ShowModal() == wx.ID_OK:
                 # 刷新任务列表
-                self.refresh_task_list_in_background()
+                gui_executor.submit(self.refresh_task_list_in_background, key="schedule-list")
                 # 刷新调度器，确保修改后的任务被正确加载
-                threading.Thread(target=self.refresh_scheduler, daemon=True).start()
+                gui_executor.submit(self.refresh_scheduler, key="scheduler-refresh")
             schedule_dlg.Destroy()
     
     def on_delete(self, event):
@@ -996,22 +1296,22 @@ class ScheduleManagementDialog(wx.Dialog):
                         # 从数据库中删除任务
                         self.db_manager.delete_cron_task(task_name)
                         # 刷新任务列表
-                        wx.CallAfter(self.refresh_task_list_in_background)
+                        gui_executor.submit(self.refresh_task_list_in_background, key="schedule-list")
                         # 刷新调度器，确保删除的任务被正确移除
-                        threading.Thread(target=self.refresh_scheduler, daemon=True).start()
+                        gui_executor.submit(self.refresh_scheduler, key="scheduler-refresh")
                         # 显示成功提示
                         wx.CallAfter(wx.MessageBox, "定时任务已删除", "提示", wx.OK | wx.ICON_INFORMATION)
                     except Exception as e:
                         print(f"删除定时任务失败: {e}")
                         wx.CallAfter(wx.MessageBox, f"删除失败: {e}", "错误", wx.OK | wx.ICON_ERROR)
                 
-                # 启动后台线程执行删除操作
-                threading.Thread(target=delete_in_background, daemon=True).start()
+                # 在后台执行删除操作
+                gui_executor.submit(delete_in_background)
     
     def on_refresh(self, event):
         """刷新定时任务列表和调度器状态"""
         # 在后台线程中执行刷新操作，避免阻塞UI
-        threading.Thread(target=self.refresh_task_list_in_background, daemon=True).start()
+        gui_executor.submit(self.refresh_task_list_in_background, key="schedule-list")
     
     def refresh_scheduler(self):
         """在后台线程中刷新调度器"""
@@ -1021,13 +1321,103 @@ class ScheduleManagementDialog(wx.Dialog):
                 print("重新加载调度器中的任务")
                 self.scheduler_manager.load_tasks()
                 # 刷新任务列表
-                wx.CallAfter(self.refresh_task_list_in_background)
+                gui_executor.submit(self.refresh_task_list_in_background, key="schedule-list")
         except Exception as e:
             print(f"刷新调度器失败: {e}")
             import traceback
             traceback.print_exc()
             wx.CallAfter(wx.MessageBox, f"刷新定时任务失败：{e}", "错误", wx.OK | wx.ICON_ERROR)
 
+class LogSearchDialog(wx.Dialog):
+    """日志全文搜索对话框"""
+    ALL_TASKS = "全部任务"
+    LEVELS = ["全部级别", "INFO", "WARNING", "ERROR"]
+    
+    def __init__(self, parent, crawler_manager, selected_task=None):
+        super().__init__(parent, title="搜索日志", size=(900, 550),
+                         style=wx.DEFAULT_DIALOG_STYLE | wx.RESIZE_BORDER)
+        self.crawler_manager = crawler_manager
+        self.searching = False
+        
+        panel = wx.Panel(self)
+        sizer = wx.BoxSizer(wx.VERTICAL)
+        
+        # 搜索条件
+        query_sizer = wx.BoxSizer(wx.HORIZONTAL)
+        self.query_text = wx.TextCtrl(panel, style=wx.TE_PROCESS_ENTER)
+        self.query_text.SetHint("输入要搜索的内容，如 403")
+        task_names = sorted(crawler_manager.get_crawlers().keys())
+        self.task_choice = wx.Choice(panel, choices=[self.ALL_TASKS] + task_names)
+        self.task_choice.SetSelection(task_names.index(selected_task) + 1 if selected_task in task_names else 0)
+        self.level_choice = wx.Choice(panel, choices=self.LEVELS)
+        self.level_choice.SetSelection(0)
+        self.search_btn = wx.Button(panel, label="搜索")
+        
+        query_sizer.Add(self.query_text, 1, wx.EXPAND | wx.ALL, 5)
+        query_sizer.Add(self.task_choice, 0, wx.ALL, 5)
+        query_sizer.Add(self.level_choice, 0, wx.ALL, 5)
+        query_sizer.Add(self.search_btn, 0, wx.ALL, 5)
+        sizer.Add(query_sizer, 0, wx.EXPAND | wx.ALL, 5)
+        
+        # 搜索结果
+        self.result_list = wx.ListCtrl(panel, style=wx.LC_REPORT | wx.LC_SINGLE_SEL | wx.LC_HRULES | wx.LC_VRULES)
+        self.result_list.InsertColumn(0, "时间", width=150)
+        self.result_list.InsertColumn(1, "任务", width=120)
+        self.result_list.InsertColumn(2, "级别", width=70)
+        self.result_list.InsertColumn(3, "内容", width=520)
+        sizer.Add(self.result_list, 1, wx.EXPAND | wx.ALL, 5)
+        
+        self.status_text = wx.StaticText(panel, label="")
+        sizer.Add(self.status_text, 0, wx.EXPAND | wx.ALL, 5)
+        
+        panel.SetSizer(sizer)
+        
+        self.Bind(wx.EVT_BUTTON, self.on_search, self.search_btn)
+        self.Bind(wx.EVT_TEXT_ENTER, self.on_search, self.query_text)
+        self.query_text.SetFocus()
+    
+    def on_search(self, event):
+        """在后台线程中检索，避免阻塞界面"""
+        if self.searching:
+            return
+        query = self.query_text.GetValue().strip()
+        task_name = self.task_choice.GetStringSelection()
+        task_name = None if task_name == self.ALL_TASKS else task_name
+        level = self.level_choice.GetStringSelection()
+        level = None if level == self.LEVELS[0] else level
+        
+        self.searching = True
+        self.search_btn.Disable()
+        self.status_text.SetLabel("正在搜索...")
+        
+        def search_in_background():
+            try:
+                start = time.time()
+                results = self.crawler_manager.search_logs(query, task_name=task_name, level=level)
+                wx.CallAfter(self.show_results, results, time.time() - start, None)
+            except Exception as e:
+                wx.CallAfter(self.show_results, [], 0, str(e))
+        
+        gui_executor.submit(search_in_background, key="log-search")
+    
+    def show_results(self, results, elapsed, error):
+        """在主线程中显示搜索结果"""
+        # 搜索完成前对话框可能已经关闭并销毁
+        if not self:
+            return
+        self.searching = False
+        self.search_btn.Enable()
+        self.result_list.DeleteAllItems()
+        if error:
+            self.status_text.SetLabel(f"搜索失败: {error}")
+            return
+        for i, result in enumerate(results):
+            index = self.result_list.InsertItem(i, result["created_at"] or "-")
+            self.result_list.SetItem(index, 1, result["task_name"])
+            self.result_list.SetItem(index, 2, result["level"] or "-")
+            self.result_list.SetItem(index, 3, result["message"])
+        self.status_text.SetLabel(f"共 {len(results)} 条结果，用时 {elapsed * 1000:.0f} 毫秒")
+
 class ScheduleDialog(wx.Dialog):
     """定时任务设置对话框"""
     def __init__(self, parent, task_name, scheduler_manager, db_manager):
@@ -1040,7 +1430,7 @@ class ScheduleDialog(wx.Dialog):
         self.init_ui_structure()
         
         # 在后台线程中加载数据
-        threading.Thread(target=self.load_data_in_background, daemon=True).start()
+        gui_executor.submit(self.load_data_in_background)
     
     def init_ui_structure(self):
         """初始化UI结构，但不加载数据"""
@@ -1193,8 +1583,8 @@ class ScheduleDialog(wx.Dialog):
                 print(f"保存定时任务失败: {e}")
                 wx.CallAfter(wx.MessageBox, f"保存失败: {e}", "错误", wx.OK | wx.ICON_ERROR)
         
-        # 启动后台线程执行保存操作
-        threading.Thread(target=save_in_background, daemon=True).start()
+        # 在后台执行保存操作
+        gui_executor.submit(save_in_background)
     
     def on_delete(self, event):
         """删除定时任务"""
@@ -1213,8 +1603,8 @@ class ScheduleDialog(wx.Dialog):
                     print(f"删除定时任务失败: {e}")
                     wx.CallAfter(wx.MessageBox, f"删除失败: {e}", "错误", wx.OK | wx.ICON_ERROR)
             
-            # 启动后台线程执行删除操作
-            threading.Thread(target=delete_in_background, daemon=True).start()
+            # 在后台执行删除操作
+            gui_executor.submit(delete_in_background)
     
     def on_cancel(self, event):
         """取消操作"""
@@ -1228,11 +1618,10 @@ class ScheduleDialog(wx.Dialog):
         current_params_text = self.param_text.GetValue().strip()
         
         # 在后台线程中检查是否有未保存的更改
-        threading.Thread(
-            target=self.check_changes_in_background,
-            args=(current_cron_expression, current_enabled, current_params_text, event),
-            daemon=True
-        ).start()
+        gui_executor.submit(
+            self.check_changes_in_background,
+            current_cron_expression, current_enabled, current_params_text, event
+        )
     
     def check_changes_in_background(self, current_cron_expression, current_enabled, current_params_text, event):
         """在后台线程中检查是否有未保存的更改"""
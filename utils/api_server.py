@@ -0,0 +1,405 @@
+"""
+本地HTTP/JSON控制接口
+
+基于asyncio实现，所有连接在同一个事件循环线程中处理，大量状态轮询不会创建线程；
+读取数据库和日志文件等阻塞操作交给少量工作线程执行。
+
+接口列表（任务名需要URL编码）:
+    GET  /api/crawlers                      所有爬虫状态
+    GET  /api/crawlers/<任务名>              单个爬虫状态及最近一次运行
+    POST /api/crawlers/<任务名>/run          运行，JSON请求体可选 {"params": {...}, "priority": "high"}
+                                            priority可选 high/normal/low，默认normal
+    POST /api/crawlers/<任务名>/stop         停止或取消排队
+    POST /api/run                           批量运行 {"tasks": [...], "params": {...}, "priority": "normal"}
+    GET  /api/crawlers/<任务名>/history?limit=50
+    GET  /api/crawlers/<任务名>/logs?lines=200        返回日志尾部和游标
+    GET  /api/crawlers/<任务名>/logs?cursor=<游标JSON> 返回游标之后新增的日志
+    GET  /api/queue                         运行队列状态
+    GET  /api/events                        状态变化的Server-Sent Events流
+"""
+import asyncio
+import json
+import os
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, unquote, urlsplit
+from core.event_bus import CRAWLER_STATUS, CRAWLERS_RELOADED
+from core.worker_pool import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+
+PRIORITIES = {"high": PRIORITY_HIGH, "normal": PRIORITY_NORMAL, "low": PRIORITY_LOW}
+
+HISTORY_FIELDS = (
+    "status", "start_time", "end_time", "error_info", "params", "exit_code", "duration", "pid", "peak_rss",
+    "cpu_seconds", "read_bytes", "write_bytes", "max_fds", "max_threads"
+)
+
+REASONS = {
+    200: "OK", 202: "Accepted", 400: "Bad Request", 401: "Unauthorized", 404: "Not Found",
+    405: "Method Not Allowed", 409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"
+}
+
+
+class ApiError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ApiServer:
+    """在后台线程的事件循环中提供控制接口"""
+    # 请求头和请求体的大小上限
+    max_header_bytes = 64 * 1024
+    max_body_bytes = 1024 * 1024
+    # SSE心跳间隔（秒），防止代理断开空闲连接
+    heartbeat_interval = 15
+    # 单个SSE客户端允许积压的事件数，超过时断开该客户端
+    max_pending_events = 1000
+    
+    def __init__(self, crawler_manager, host=None, port=None, token=None):
+        """
+        Args:
+            crawler_manager: CrawlerManager实例
+            host: 监听地址，None时读取环境变量API_HOST（默认127.0.0.1）
+            port: 监听端口，None时读取环境变量API_PORT，0表示随机端口
+            token: 访问令牌，None时读取环境变量API_TOKEN；设置后请求需带 Authorization: Bearer <令牌>
+        """
+        self.crawler_manager = crawler_manager
+        self.host = host or os.environ.get("API_HOST", "127.0.0.1")
+        self.port = int(port if port is not None else os.environ.get("API_PORT", 0))
+        self.token = token if token is not None else os.environ.get("API_TOKEN") or None
+        self.routes = [
+            ("GET", re.compile(r"^/api/crawlers$"), self.list_crawlers),
+            ("GET", re.compile(r"^/api/crawlers/([^/]+)$"), self.get_crawler),
+            ("POST", re.compile(r"^/api/crawlers/([^/]+)/run$"), self.run_crawler),
+            ("POST", re.compile(r"^/api/crawlers/([^/]+)/stop$"), self.stop_crawler),
+            ("POST", re.compile(r"^/api/run$"), self.run_batch),
+            ("GET", re.compile(r"^/api/crawlers/([^/]+)/history$"), self.get_history),
+            ("GET", re.compile(r"^/api/crawlers/([^/]+)/logs$"), self.get_logs),
+            ("GET", re.compile(r"^/api/queue$"), self.get_queue),
+        ]
+        self.loop = None
+        self._server = None
+        self._thread = None
+        self._ready = threading.Event()
+        self._start_error = None
+        # 数据库和日志文件读取在少量工作线程中执行
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="api")
+        self._subscribers = set()
+    
+    def start(self):
+        """启动事件循环线程，端口绑定完成后返回"""
+        self._thread = threading.Thread(target=self._run_loop, name="api-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+        if self._start_error is not None:
+            raise self._start_error
+        # 状态变化由事件总线推送，不需要轮询
+        event_bus = self.crawler_manager.event_bus
+        event_bus.subscribe(CRAWLER_STATUS, self._on_status)
+        event_bus.subscribe(CRAWLERS_RELOADED, self._on_reloaded)
+        print(f"控制接口已启动: http://{self.host}:{self.port}/api/crawlers")
+        return self
+    
+    def stop(self):
+        event_bus = self.crawler_manager.event_bus
+        event_bus.unsubscribe(CRAWLER_STATUS, self._on_status)
+        event_bus.unsubscribe(CRAWLERS_RELOADED, self._on_reloaded)
+        if self.loop is not None and self.loop.is_running():
+            self.loop.call_soon_threadsafe(self.loop.stop)
+        if self._thread is not None:
+            self._thread.join(5)
+        self.executor.shutdown(wait=False)
+    
+    def _run_loop(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self._server = self.loop.run_until_complete(
+                asyncio.start_server(self._handle_connection, self.host, self.port, limit=self.max_header_bytes)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+        except Exception as e:
+            self._start_error = e
+            self._ready.set()
+            self.loop.close()
+            return
+        self._ready.set()
+        try:
+            self.loop.run_forever()
+        finally:
+            self._server.close()
+            tasks = asyncio.all_tasks(self.loop)
+            for task in tasks:
+                task.cancel()
+            self.loop.run_until_complete(asyncio.gather(*tasks, return_exceptions=True))
+            self.loop.close()
+    
+    async def _handle_connection(self, reader, writer):
+        """处理一个连接上的请求，支持keep-alive"""
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, query, headers, body = request
+                keep_alive = headers.get("connection", "").lower() != "close"
+                if self.token and headers.get("authorization") != f"Bearer {self.token}":
+                    await self._send_json(writer, 401, {"error": "未授权"}, keep_alive)
+                elif method == "GET" and path == "/api/events":
+                    await self._stream_events(writer)
+                    break
+                else:
+                    status, payload = await self._dispatch(method, path, query, body)
+                    await self._send_json(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except ApiError as e:
+            await self._send_json(writer, e.status, {"error": str(e)}, False)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # 停止服务时取消仍然打开的连接
+            pass
+        finally:
+            writer.close()
+    
+    async def _read_request(self, reader):
+        """读取并解析一个请求，连接关闭时返回None"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError as e:
+            if e.partial.strip():
+                raise
+            return None
+        except asyncio.LimitOverrunError:
+            raise ApiError(413, "请求头过大")
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, version = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        if version == "HTTP/1.0" and "connection" not in headers:
+            headers["connection"] = "close"
+        length = int(headers.get("content-length", 0))
+        if length > self.max_body_bytes:
+            raise ApiError(413, "请求体过大")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        query = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        return method.upper(), url.path, query, headers, body
+    
+    async def _dispatch(self, method, path, query, body):
+        allowed = False
+        for route_method, pattern, handler in self.routes:
+            match = pattern.match(path)
+            if not match:
+                continue
+            if route_method != method:
+                allowed = True
+                continue
+            try:
+                data = json.loads(body) if body else {}
+                if not isinstance(data, dict):
+                    raise ApiError(400, "请求体必须是JSON对象")
+                args = [unquote(group) for group in match.groups()]
+                return await handler(*args, query=query, data=data)
+            except ApiError as e:
+                return e.status, {"error": str(e)}
+            except json.JSONDecodeError:
+                return 400, {"error": "请求体不是有效的JSON"}
+            except Exception as e:
+                print(f"处理接口请求失败: {method} {path}, {e}")
+                return 500, {"error": str(e)}
+        if allowed:
+            return 405, {"error": "不支持的请求方法"}
+        return 404, {"error": "接口不存在"}
+    
+    async def _send_json(self, writer, status, payload, keep_alive=True):
+        body = json.dumps(payload, ensure_ascii=False, default=str).encode("utf-8")
+        head = (
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            "Content-Type: application/json; charset=utf-8\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+        )
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+    
+    def _run_blocking(self, func, *args):
+        return self.loop.run_in_executor(self.executor, func, *args)
+    
+    def _require_crawler(self, task_name):
+        crawler = self.crawler_manager.get_crawler(task_name)
+        if crawler is None:
+            raise ApiError(404, f"爬虫不存在: {task_name}")
+        return crawler
+    
+    @staticmethod
+    def _parse_priority(value):
+        """优先级只接受 high/normal/low，省略时为normal"""
+        if value is None:
+            return PRIORITY_NORMAL
+        if isinstance(value, str) and value in PRIORITIES:
+            return PRIORITIES[value]
+        raise ApiError(400, f"无效的优先级: {value}，可选值: {', '.join(PRIORITIES)}")
+    
+    @staticmethod
+    def _parse_params(data):
+        """运行参数必须是JSON对象，省略或null时使用爬虫当前的参数"""
+        params = data.get("params")
+        if params is not None and not isinstance(params, dict):
+            raise ApiError(400, "params必须是JSON对象")
+        return params
+    
+    @staticmethod
+    def _parse_int(query, name, default):
+        try:
+            return int(query.get(name, default))
+        except ValueError:
+            raise ApiError(400, f"参数 {name} 必须是整数")
+    
+    # ---- 接口处理 ----
+    
+    async def list_crawlers(self, query, data):
+        return 200, {"crawlers": self.crawler_manager.get_all_crawler_status()}
+    
+    async def get_crawler(self, task_name, query, data):
+        self._require_crawler(task_name)
+        status = self.crawler_manager.get_crawler_status(task_name)
+        crawler_run = self.crawler_manager.get_run(task_name)
+        if crawler_run is not None:
+            status["run"] = {
+                "run_id": crawler_run.run_id,
+                "status": crawler_run.status,
+                "wait_time": crawler_run.wait_time,
+                "duration": crawler_run.duration,
+                "exit_code": crawler_run.exit_code,
+            }
+        return 200, status
+    
+    async def run_crawler(self, task_name, query, data):
+        self._require_crawler(task_name)
+        params = self._parse_params(data)
+        priority = self._parse_priority(data.get("priority"))
+        if not self.crawler_manager.run_crawler(task_name, params, priority=priority):
+            raise ApiError(409, f"爬虫正在排队或运行中: {task_name}")
+        return 202, {"task_name": task_name, "queued": True}
+    
+    async def stop_crawler(self, task_name, query, data):
+        self._require_crawler(task_name)
+        self.crawler_manager.stop_crawler(task_name)
+        return 202, {"task_name": task_name, "stopping": True}
+    
+    async def run_batch(self, query, data):
+        tasks = data.get("tasks")
+        if not isinstance(tasks, list) or not all(isinstance(task_name, str) for task_name in tasks):
+            raise ApiError(400, "tasks必须是任务名列表")
+        params = self._parse_params(data)
+        priority = self._parse_priority(data.get("priority"))
+        results = {}
+        for task_name in tasks:
+            if self.crawler_manager.get_crawler(task_name) is None:
+                results[task_name] = "not_found"
+            elif self.crawler_manager.run_crawler(task_name, params, priority=priority):
+                results[task_name] = "queued"
+            else:
+                results[task_name] = "busy"
+        return 202, {"results": results}
+    
+    async def get_history(self, task_name, query, data):
+        self._require_crawler(task_name)
+        limit = self._parse_int(query, "limit", 50)
+        rows = await self._run_blocking(self.crawler_manager.get_task_history, task_name, limit)
+        return 200, {"task_name": task_name, "history": [dict(zip(HISTORY_FIELDS, row)) for row in rows]}
+    
+    async def get_logs(self, task_name, query, data):
+        self._require_crawler(task_name)
+        log_manager = self.crawler_manager.log_manager
+        if "cursor" in query:
+            try:
+                cursor = json.loads(query["cursor"])
+            except ValueError:
+                raise ApiError(400, "cursor不是有效的JSON")
+            content, cursor = await self._run_blocking(log_manager.read_tail, task_name, cursor)
+        else:
+            lines = self._parse_int(query, "lines", 200)
+            content, cursor = await self._run_blocking(log_manager.open_tail, task_name, lines)
+        return 200, {"task_name": task_name, "content": content, "cursor": cursor}
+    
+    async def get_queue(self, query, data):
+        return 200, self.crawler_manager.get_queue_stats()
+    
+    # ---- 状态变化事件流 ----
+    
+    def _status_snapshot(self):
+        return {status["task_name"]: status for status in self.crawler_manager.get_all_crawler_status()}
+    
+    def _on_status(self, task_name, status, old_status):
+        """事件总线回调，在发布状态的线程中执行，转交事件循环广播"""
+        if not self._subscribers:
+            return
+        crawler = self.crawler_manager.get_crawler(task_name)
+        payload = {
+            "task_name": task_name,
+            "status": status,
+            "old_status": old_status,
+            "last_run_time": crawler.last_run_time if crawler else None,
+            "error_info": crawler.error_info if crawler else None,
+        }
+        self._call_in_loop(self._publish, "status", payload)
+    
+    def _on_reloaded(self, diff):
+        if self._subscribers:
+            self._call_in_loop(self._publish, "reload", diff)
+    
+    def _call_in_loop(self, callback, *args):
+        try:
+            self.loop.call_soon_threadsafe(callback, *args)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+    
+    def _publish(self, event, payload):
+        for subscriber in list(self._subscribers):
+            try:
+                subscriber.put_nowait((event, payload))
+            except asyncio.QueueFull:
+                # 客户端读取太慢，放入None通知断开
+                self._subscribers.discard(subscriber)
+                while not subscriber.empty():
+                    subscriber.get_nowait()
+                subscriber.put_nowait(None)
+    
+    async def _stream_events(self, writer):
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/event-stream; charset=utf-8\r\n"
+            b"Cache-Control: no-cache\r\n"
+            b"Connection: keep-alive\r\n\r\n"
+        )
+        subscriber = asyncio.Queue(self.max_pending_events)
+        # 先发送当前全部状态，之后只推送变化
+        writer.write(self._format_event("snapshot", list(self._status_snapshot().values())))
+        self._subscribers.add(subscriber)
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    item = await asyncio.wait_for(subscriber.get(), self.heartbeat_interval)
+                except asyncio.TimeoutError:
+                    writer.write(b": keep-alive\n\n")
+                else:
+                    if item is None:
+                        break
+                    writer.write(self._format_event(*item))
+                await writer.drain()
+        finally:
+            self._subscribers.discard(subscriber)
+    
+    @staticmethod
+    def _format_event(event, payload):
+        data = json.dumps(payload, ensure_ascii=False, default=str)
+        return f"event: {event}\ndata: {data}\n\n".encode("utf-8")
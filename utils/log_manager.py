@@ -1,9 +1,385 @@
+import gzip
+import json
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import re
+import shutil
+import threading
+from collections import deque
+from logging.handlers import QueueHandler, RotatingFileHandler, TimedRotatingFileHandler
+from utils import metrics
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# 轮转文件的后缀：按大小轮转为序号，按时间轮转为日期时间，压缩后带.gz/.zst
+ROTATED_SUFFIX = re.compile(r"^(\d+|\d{4}-\d{2}-\d{2}(_\d{2}(-\d{2}){0,2})?)(\.gz|\.zst)?$")
+
+
+def open_log_file(path):
+    """以二进制方式打开日志文件，压缩的轮转文件透明解压"""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        if zstandard is None:
+            raise OSError(f"未安装zstandard，无法读取 {path}")
+        return zstandard.open(path, "rb")
+    return open(path, "rb")
+
+
+def list_log_files(log_dir, name):
+    """列出任务的日志文件（包括压缩的轮转文件），按从旧到新排列，当前日志文件在最后"""
+    base = f"{name}.log"
+    rotated = []
+    try:
+        file_names = os.listdir(log_dir)
+    except OSError:
+        return []
+    for file_name in file_names:
+        if file_name.startswith(base + ".") and ROTATED_SUFFIX.match(file_name[len(base) + 1:]):
+            path = os.path.join(log_dir, file_name)
+            try:
+                rotated.append((os.stat(path).st_mtime_ns, path))
+            except OSError:
+                continue
+    paths = [path for _, path in sorted(rotated)]
+    current = os.path.join(log_dir, base)
+    if os.path.exists(current):
+        paths.append(current)
+    return paths
+
+
+class JsonLineFormatter(logging.Formatter):
+    """每条日志输出为一行JSON，包含时间、级别、任务名和运行ID，便于批量导入和过滤"""
+    def format(self, record):
+        data = {
+            "time": f"{self.formatTime(record, '%Y-%m-%d %H:%M:%S')}.{int(record.msecs):03d}",
+            "level": record.levelname,
+            "task": record.name[len("crawler."):] if record.name.startswith("crawler.") else record.name,
+            "run_id": getattr(record, "run_id", None),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            data["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(data, ensure_ascii=False)
+
+
+class RunIdFilter(logging.Filter):
+    """为日志记录附加当前运行的run_id，同一任务同一时间只有一个运行"""
+    def __init__(self):
+        super().__init__()
+        self.run_id = None
+    
+    def filter(self, record):
+        record.run_id = self.run_id
+        return True
+
+
+class LogCompressor:
+    """
+    轮转日志后台压缩
+    
+    作为文件处理器的namer/rotator使用：轮转时只做重命名，
+    压缩在后台线程中进行，先写入隐藏的临时文件再替换，不阻塞日志写入。
+    """
+    def __init__(self, method="gzip"):
+        if method == "zstd" and zstandard is None:
+            print("未安装zstandard，日志改用gzip压缩")
+            method = "gzip"
+        self.method = method
+        self.extension = ".zst" if method == "zstd" else ".gz"
+        # 替换压缩文件与轮转时的文件清理互斥
+        self.lock = threading.Lock()
+        self._queue = queue.Queue()
+        # 排队中尚未开始压缩的文件 source -> dest，以及正在压缩的文件 source -> 完成事件
+        self._jobs_lock = threading.Lock()
+        self._pending = {}
+        self._running = {}
+        self._thread = threading.Thread(target=self._run, name="log-compressor", daemon=True)
+        self._thread.start()
+    
+    def namer(self, name):
+        return name + self.extension
+    
+    def rotator(self, source, dest):
+        """将当前日志改名为未压缩的轮转文件，再交给后台线程压缩为dest"""
+        plain = dest[:-len(self.extension)]
+        if os.path.exists(source):
+            os.rename(source, plain)
+            self.submit(plain, dest)
+    
+    def submit(self, source, dest=None):
+        """把文件加入压缩队列，dest默认为source加压缩扩展名"""
+        with self._jobs_lock:
+            self._pending[source] = dest or source + self.extension
+        self._queue.put(source)
+    
+    def wait(self):
+        """等待所有排队中的文件压缩完成"""
+        self._queue.join()
+    
+    def wait_for(self, prefix):
+        """
+        只等待以prefix开头的文件压缩完成
+        
+        尚未开始的由调用线程直接压缩，不用排在其他任务的文件后面；
+        正在压缩的等待其完成。
+        """
+        with self._jobs_lock:
+            own = [(source, dest) for source, dest in self._pending.items() if source.startswith(prefix)]
+            for source, _ in own:
+                del self._pending[source]
+            events = [event for source, event in self._running.items() if source.startswith(prefix)]
+        for event in events:
+            event.wait()
+        for source, dest in own:
+            self._compress_safely(source, dest)
+    
+    def _compress_safely(self, source, dest):
+        try:
+            self._compress(source, dest)
+        except Exception as e:
+            print(f"压缩日志文件失败: {source}, {e}")
+    
+    def _run(self):
+        while True:
+            source = self._queue.get()
+            with self._jobs_lock:
+                dest = self._pending.pop(source, None)
+                event = threading.Event()
+                if dest is not None:
+                    self._running[source] = event
+            try:
+                # 已被轮转线程取走直接压缩的文件跳过
+                if dest is not None:
+                    self._compress_safely(source, dest)
+            finally:
+                with self._jobs_lock:
+                    self._running.pop(source, None)
+                event.set()
+                self._queue.task_done()
+    
+    def _compress(self, source, dest):
+        directory, file_name = os.path.split(dest)
+        # 以.开头的临时文件不会被轮转清理和日志读取识别为日志文件
+        tmp_path = os.path.join(directory, f".{file_name}.tmp")
+        with open(source, "rb") as src:
+            if self.method == "zstd":
+                with open(tmp_path, "wb") as raw:
+                    with zstandard.ZstdCompressor().stream_writer(raw) as dst:
+                        shutil.copyfileobj(src, dst, 1024 * 1024)
+            else:
+                with gzip.open(tmp_path, "wb") as dst:
+                    shutil.copyfileobj(src, dst, 1024 * 1024)
+        # 保留原文件的修改时间，日志文件按修改时间排序
+        st = os.stat(source)
+        os.utime(tmp_path, ns=(st.st_atime_ns, st.st_mtime_ns))
+        with self.lock:
+            os.replace(tmp_path, dest)
+            os.remove(source)
+
+
+class _CompressedRolloverMixin:
+    """轮转前等待本文件上一次的压缩完成，避免重命名时覆盖尚未压缩的文件，不等待其他任务的压缩"""
+    compressor = None
+    
+    def doRollover(self):
+        if self.compressor is None:
+            return super().doRollover()
+        self.compressor.wait_for(self.baseFilename + ".")
+        with self.compressor.lock:
+            super().doRollover()
+
+
+class CompressedRotatingFileHandler(_CompressedRolloverMixin, RotatingFileHandler):
+    pass
+
+
+class CompressedTimedRotatingFileHandler(_CompressedRolloverMixin, TimedRotatingFileHandler):
+    pass
+
+
+class RingBufferHandler(logging.Handler):
+    """
+    内存日志环形缓冲区
+    
+    保存最近capacity行格式化后的日志，每行带递增序号，
+    读取方通过get_records_after(seq)只获取序号seq之后的新日志。
+    """
+    def __init__(self, capacity=2000):
+        super().__init__()
+        self._records = deque(maxlen=capacity)
+        self.last_seq = 0
+    
+    @property
+    def first_seq(self):
+        """缓冲区中最早一行的序号，为空时返回last_seq + 1"""
+        with self.lock:
+            return self._records[0][0] if self._records else self.last_seq + 1
+    
+    def emit(self, record):
+        try:
+            line = self.format(record)
+        except Exception:
+            self.handleError(record)
+            return
+        # handle()已持有self.lock
+        self.last_seq += 1
+        self._records.append((self.last_seq, line))
+    
+    def get_records_after(self, seq=0, limit=None):
+        """
+        获取序号大于seq的日志
+        
+        Args:
+            seq: 已读取到的序号，0表示从头读取
+            limit: 最多返回最新的limit行，None表示不限制
+            
+        Returns:
+            [(序号, 日志行), ...]，seq早于缓冲区起点时返回缓冲区中的全部日志
+        """
+        with self.lock:
+            count = min(len(self._records), max(0, self.last_seq - seq))
+            if limit is not None:
+                count = min(count, limit)
+            # deque两端的下标访问是O(1)，新日志都在尾部
+            size = len(self._records)
+            return [self._records[i] for i in range(size - count, size)]
+    
+    def clear(self):
+        """清空缓冲区，序号继续递增"""
+        with self.lock:
+            self._records.clear()
+
+class QueuedLogWriter:
+    """
+    日志后台写入线程
+    
+    爬虫线程通过QueueHandler把日志记录放入队列后立即返回，
+    本线程批量取出记录，按logger名分组交给对应的文件处理器，
+    每组只检查一次轮转、只写入和刷新一次文件。
+    """
+    def __init__(self, batch_size=500):
+        self.batch_size = batch_size
+        self.queue = queue.SimpleQueue()
+        self._handlers = {}
+        self._lock = threading.Lock()
+        self._closed = False
+        self.records_written = 0
+        self.batches_written = 0
+        self._thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self._thread.start()
+    
+    def set_handler(self, logger_name, handler):
+        """设置logger对应的文件处理器，替换并关闭旧的处理器"""
+        with self._lock:
+            old = self._handlers.get(logger_name)
+            self._handlers[logger_name] = handler
+        if old is not None and old is not handler:
+            old.close()
+    
+    def flush(self, timeout=None):
+        """等待此前入队的日志全部写入文件"""
+        if not self._thread.is_alive():
+            return True
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+    
+    def close(self, timeout=None):
+        """写完剩余日志后停止写入线程并关闭文件"""
+        if self._closed:
+            return
+        self._closed = True
+        self.queue.put(None)
+        self._thread.join(timeout)
+        with self._lock:
+            handlers = list(self._handlers.values())
+            self._handlers.clear()
+        for handler in handlers:
+            handler.close()
+    
+    def _run(self):
+        while True:
+            records = []
+            waiters = []
+            stopping = False
+            item = self.queue.get()
+            # 取出队列中已有的记录，最多batch_size条，不等待
+            while True:
+                if item is None:
+                    stopping = True
+                    break
+                if isinstance(item, threading.Event):
+                    waiters.append(item)
+                else:
+                    records.append(item)
+                if len(records) >= self.batch_size:
+                    break
+                try:
+                    item = self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if records:
+                self._write_batch(records)
+            for waiter in waiters:
+                waiter.set()
+            if stopping:
+                return
+    
+    def _write_batch(self, records):
+        groups = {}
+        for record in records:
+            groups.setdefault(record.name, []).append(record)
+        with self._lock:
+            for logger_name, group in groups.items():
+                handler = self._handlers.get(logger_name)
+                if handler is None:
+                    continue
+                handler.acquire()
+                try:
+                    data = "".join(handler.format(record) + handler.terminator for record in group)
+                    if handler.shouldRollover(group[0]):
+                        handler.doRollover()
+                    if handler.stream is None:
+                        handler.stream = handler._open()
+                    handler.stream.write(data)
+                    handler.stream.flush()
+                    task_name = logger_name[len("crawler."):] if logger_name.startswith("crawler.") else logger_name
+                    metrics.LOG_BYTES_WRITTEN.inc(task_name, amount=len(data.encode("utf-8")))
+                except Exception as e:
+                    print(f"写入日志文件失败: {logger_name}, {e}")
+                finally:
+                    handler.release()
+        self.records_written += len(records)
+        self.batches_written += 1
 
 class LogManager:
-    def __init__(self, log_dir="logs"):
+    # 尾部读取时每次向前读取的块大小
+    tail_chunk_size = 4 * 1024
+    # read_tail单次最多返回的字节数，超出时只保留最新部分
+    tail_max_bytes = 256 * 1024
+    # 每个任务在内存中保留的日志行数
+    buffer_capacity = 2000
+    
+    def __init__(self, log_dir="logs", queued=None, rotate_when=None, max_bytes=None, backup_count=None,
+                 compress=None, log_format=None):
+        """
+        未指定的参数读取同名环境变量
+        
+        Args:
+            log_dir: 日志目录
+            queued: 是否由后台线程写入日志文件（LOG_QUEUE，默认开启）
+            rotate_when: 轮转方式（LOG_ROTATE_WHEN），size按大小，
+                         或TimedRotatingFileHandler的when取值如midnight、H、D
+            max_bytes: 按大小轮转时单个文件的最大字节数（LOG_MAX_BYTES，默认10MB）
+            backup_count: 保留的轮转文件数（LOG_BACKUP_COUNT，默认5）
+            compress: 轮转文件的压缩方式（LOG_COMPRESS），gzip、zstd或none，默认gzip
+            log_format: 日志文件格式（LOG_FORMAT），text或json，默认text
+        """
         import os
         # 确保日志目录在当前工作目录
         self.log_dir = os.path.join(os.getcwd(), log_dir)
@@ -11,6 +387,26 @@ class LogManager:
             os.makedirs(self.log_dir)
             print(f"已创建日志目录: {self.log_dir}")
         
+        # 每个任务的内存日志缓冲区，重新加载爬虫时保留
+        self.buffers = {}
+        self._buffers_lock = threading.Lock()
+        
+        # 队列模式下爬虫线程只入队，文件由后台线程批量写入
+        if queued is None:
+            queued = os.environ.get("LOG_QUEUE", "1") != "0"
+        self.writer = QueuedLogWriter() if queued else None
+        
+        # 日志文件轮转和格式
+        env = os.environ.get
+        self.rotate_when = (rotate_when or env("LOG_ROTATE_WHEN", "size")).lower()
+        self.max_bytes = int(max_bytes if max_bytes is not None else env("LOG_MAX_BYTES", 10 * 1024 * 1024))
+        self.backup_count = int(backup_count if backup_count is not None else env("LOG_BACKUP_COUNT", 5))
+        compress = (compress or env("LOG_COMPRESS", "gzip")).lower()
+        self.compressor = LogCompressor(compress) if compress in ("gzip", "zstd") else None
+        self.log_format = (log_format or env("LOG_FORMAT", "text")).lower()
+        # 每个任务当前运行的run_id
+        self.run_filters = {}
+        
         # 配置根日志
         logging.basicConfig(
             level=logging.INFO,
@@ -29,22 +425,40 @@ class LogManager:
         
         # 创建文件处理器
         log_file = os.path.join(self.log_dir, f"{name}.log")
-        file_handler = RotatingFileHandler(
-            log_file,
-            maxBytes=10*1024*1024,  # 10MB
-            backupCount=5,
-            encoding='utf-8'  # 明确指定utf-8编码，解决中文乱码问题
-        )
+        file_handler = self._create_file_handler(log_file)
         
-        # 设置日志格式
+        # 设置日志格式，内存缓冲区始终使用文本格式便于查看
         formatter = logging.Formatter(
             '%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt='%Y-%m-%d %H:%M:%S'
         )
-        file_handler.setFormatter(formatter)
+        file_formatter = JsonLineFormatter() if self.log_format == "json" else formatter
+        file_handler.setFormatter(file_formatter)
+        
+        # 为日志记录附加run_id
+        with self._buffers_lock:
+            run_filter = self.run_filters.setdefault(name, RunIdFilter())
+        logger.addFilter(run_filter)
+        
+        # 内存缓冲区供界面实时查看，不需要读取日志文件
+        with self._buffers_lock:
+            buffer = self.buffers.get(name)
+            if buffer is None:
+                buffer = RingBufferHandler(self.buffer_capacity)
+                buffer.setFormatter(formatter)
+                self.buffers[name] = buffer
         
         # 添加处理器到logger
-        logger.addHandler(file_handler)
+        if self.writer is not None:
+            # QueueHandler在当前线程中格式化出完整的日志行，后台线程只负责写入
+            queue_handler = QueueHandler(self.writer.queue)
+            queue_handler.setFormatter(file_formatter)
+            file_handler.setFormatter(logging.Formatter('%(message)s'))
+            self.writer.set_handler(logger.name, file_handler)
+            logger.addHandler(queue_handler)
+        else:
+            logger.addHandler(file_handler)
+        logger.addHandler(buffer)
         logger.setLevel(logging.INFO)
         logger.propagate = False  # 防止日志传播到父logger
         
@@ -132,7 +546,208 @@ class LogManager:
         
         return ''.join(lines)
     
+    def _create_file_handler(self, log_file):
+        """按配置创建按大小或按时间轮转的文件处理器"""
+        if self.rotate_when == "size":
+            handler_class = CompressedRotatingFileHandler if self.compressor else RotatingFileHandler
+            handler = handler_class(
+                log_file,
+                maxBytes=self.max_bytes,
+                backupCount=self.backup_count,
+                encoding='utf-8'  # 明确指定utf-8编码，解决中文乱码问题
+            )
+        else:
+            handler_class = CompressedTimedRotatingFileHandler if self.compressor else TimedRotatingFileHandler
+            handler = handler_class(
+                log_file,
+                when=self.rotate_when,
+                backupCount=self.backup_count,
+                encoding='utf-8'
+            )
+        if self.compressor is not None:
+            handler.compressor = self.compressor
+            handler.namer = self.compressor.namer
+            handler.rotator = self.compressor.rotator
+            # 补压缩上次退出时未压缩完的和开启压缩前留下的轮转文件，
+            # 否则下次轮转时可能被同名文件覆盖
+            log_dir, file_name = os.path.split(log_file)
+            for path in list_log_files(log_dir, file_name[:-len(".log")])[:-1]:
+                if not path.endswith((".gz", ".zst")) and not os.path.exists(path + self.compressor.extension):
+                    self.compressor.submit(path)
+        return handler
+    
+    def set_run_id(self, name, run_id):
+        """设置任务当前运行的run_id，之后的日志记录都带有该run_id"""
+        with self._buffers_lock:
+            run_filter = self.run_filters.setdefault(name, RunIdFilter())
+        run_filter.run_id = run_id
+    
+    def flush(self, timeout=None):
+        """等待排队中的日志写入文件"""
+        if self.writer is not None:
+            return self.writer.flush(timeout)
+        return True
+    
+    def close(self):
+        """写完排队中的日志并关闭日志文件"""
+        if self.writer is not None:
+            self.writer.close()
+    
+    def get_buffer(self, name):
+        """获取任务的内存日志缓冲区，任务尚未创建logger时返回None"""
+        with self._buffers_lock:
+            return self.buffers.get(name)
+    
+    def read_buffer(self, name, seq=0, limit=None):
+        """
+        从内存缓冲区读取序号seq之后的日志
+        
+        Returns:
+            (日志内容, 最后一行的序号)，没有缓冲区时返回 ("", seq)
+        """
+        buffer = self.get_buffer(name)
+        if buffer is None:
+            return "", seq
+        records = buffer.get_records_after(seq, limit)
+        if not records:
+            return "", min(seq, buffer.last_seq)
+        return "".join(line + "\n" for _, line in records), records[-1][0]
+    
+    def open_tail(self, name, max_lines=200):
+        """
+        打开日志尾部游标：返回最新的max_lines行及指向末尾的游标，
+        之后用read_tail只读取新增内容
+        
+        任务有内存缓冲区时直接从内存读取；缓冲区为空（本次启动后还没有日志）时
+        从日志文件读取历史内容，游标同时记录缓冲区序号，之后的新日志仍从内存读取。
+        
+        Args:
+            name: 任务名称
+            max_lines: 初始返回的最大行数
+            
+        Returns:
+            (日志内容, 游标)
+        """
+        buffer = self.get_buffer(name)
+        seq = buffer.last_seq if buffer is not None else None
+        if buffer is not None and buffer.get_records_after(0, 1):
+            content, seq = self.read_buffer(name, 0, max_lines)
+            return content, {"inode": None, "offset": 0, "seq": seq}
+        
+        log_file = os.path.join(self.log_dir, f"{name}.log")
+        try:
+            with open(log_file, 'rb') as f:
+                st = os.fstat(f.fileno())
+                end = st.st_size
+                # 从末尾向前按块读取，直到取够max_lines行
+                data = b""
+                pos = end
+                while pos > 0 and data.count(b"\n") <= max_lines:
+                    read_pos = max(0, pos - self.tail_chunk_size)
+                    f.seek(read_pos)
+                    data = f.read(pos - read_pos) + data
+                    pos = read_pos
+        except OSError:
+            return "", {"inode": None, "offset": 0, "seq": seq}
+        lines = data.splitlines(True)
+        if pos > 0 and lines:
+            # 丢弃可能不完整的第一行
+            lines.pop(0)
+        content = b"".join(lines[-max_lines:]) if max_lines > 0 else b""
+        return self._decode(content), {"inode": st.st_ino, "offset": end, "seq": seq}
+    
+    def read_tail(self, name, cursor=None, max_bytes=None):
+        """
+        读取游标之后新增的日志内容，只返回完整的行
+        
+        游标带有缓冲区序号时从内存读取，否则读取日志文件。
+        读取文件时能识别RotatingFileHandler轮转（inode变化）和清空日志（文件变短）；
+        轮转时先读完最新的轮转文件（可能已压缩）中剩余的内容再从新文件开头继续。
+        新增内容超过max_bytes时跳过较早的部分，只保留最新的max_bytes字节。
+        
+        Args:
+            name: 任务名称
+            cursor: open_tail或上次read_tail返回的游标，None表示从文件开头读取
+            max_bytes: 单次最多返回的字节数
+            
+        Returns:
+            (新增内容, 新游标)
+        """
+        if cursor and cursor.get("seq") is not None and self.get_buffer(name) is not None:
+            content, seq = self.read_buffer(name, cursor["seq"])
+            return content, dict(cursor, seq=seq)
+        
+        max_bytes = max_bytes or self.tail_max_bytes
+        log_file = os.path.join(self.log_dir, f"{name}.log")
+        inode = cursor["inode"] if cursor else None
+        offset = cursor["offset"] if cursor else 0
+        try:
+            st = os.stat(log_file)
+        except OSError:
+            return "", {"inode": None, "offset": 0}
+        
+        data = b""
+        if inode is not None and inode != st.st_ino:
+            # 文件已轮转，先读完最新的轮转文件中剩余的内容
+            data = self._read_rotated_remainder(name, inode, offset, max_bytes)
+            offset = 0
+        elif st.st_size < offset:
+            # 日志被清空或截断
+            offset = 0
+        
+        try:
+            with open(log_file, 'rb') as f:
+                end = os.fstat(f.fileno()).st_size
+                if end - offset > max_bytes:
+                    offset = end - max_bytes
+                    data = b""
+                f.seek(offset)
+                chunk = f.read(end - offset)
+        except OSError:
+            return self._decode(data), {"inode": st.st_ino, "offset": offset}
+        
+        # 只消费到最后一个换行符，未写完的行留到下次读取
+        last_newline = chunk.rfind(b"\n")
+        if last_newline == -1:
+            chunk = b""
+        else:
+            chunk = chunk[:last_newline + 1]
+        new_offset = offset + len(chunk)
+        data += chunk
+        if len(data) > max_bytes:
+            data = data[-max_bytes:]
+            data = data[data.find(b"\n") + 1:]
+        return self._decode(data), {"inode": st.st_ino, "offset": new_offset}
+    
+    def _read_rotated_remainder(self, name, inode, offset, max_bytes):
+        """读取轮转前未读完的旧日志文件剩余部分，旧文件可能已被压缩"""
+        rotated = list_log_files(self.log_dir, name)[:-1]
+        if not rotated:
+            return b""
+        latest = rotated[-1]
+        try:
+            with open_log_file(latest) as f:
+                # 未压缩的文件可以通过inode确认是同一个文件
+                if not latest.endswith((".gz", ".zst")):
+                    if os.fstat(f.fileno()).st_ino != inode:
+                        return b""
+                f.seek(offset)
+                return f.read(max_bytes)
+        except (OSError, EOFError):
+            return b""
+    
+    @staticmethod
+    def _decode(data):
+        """日志默认utf-8编码，兼容旧的gbk日志"""
+        try:
+            return data.decode('utf-8')
+        except UnicodeDecodeError:
+            return data.decode('gbk', errors='replace')
+    
     def clear_log(self, name):
+        buffer = self.get_buffer(name)
+        if buffer is not None:
+            buffer.clear()
         log_file = os.path.join(self.log_dir, f"{name}.log")
         if os.path.exists(log_file):
             with open(log_file, 'w', encoding='utf-8') as f:
@@ -0,0 +1,327 @@
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from utils.log_manager import list_log_files, open_log_file
+
+class LogSearchIndex:
+    """
+    任务日志全文索引
+
+    后台线程增量地把logs目录下的日志行（包括轮转和压缩后的文件）写入
+    旁路数据库log_index.db，按任务、级别、时间建立索引，并用FTS5提供全文检索。
+
+    每个日志文件按首行内容识别为一个"分段"，记录已索引到的字节偏移：
+    文件轮转改名后首行不变，不会重复索引；文件被清空或轮转删除后，
+    对应分段的索引行随之删除。
+    """
+    DB_NAME = "log_index.db"
+    # 文本日志行: 2024-01-01 12:00:00 - crawler.任务名 - INFO - 消息，JSON日志行按字段解析
+    LINE_PATTERN = re.compile(r"^(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}) - \S+ - ([A-Z]+) - (.*)$")
+
+    def __init__(self, log_dir, db_file=None, interval=None, batch_size=5000):
+        """
+        Args:
+            log_dir: 日志目录
+            db_file: 索引数据库路径，默认为日志目录下的log_index.db
+            interval: 后台索引间隔（秒），None时读取环境变量LOG_INDEX_INTERVAL（默认60），0表示不启动后台索引
+            batch_size: 每个事务写入的行数
+        """
+        self.log_dir = log_dir
+        self.db_file = db_file or os.path.join(log_dir, self.DB_NAME)
+        self.interval = float(interval if interval is not None else os.environ.get("LOG_INDEX_INTERVAL", 60))
+        self.batch_size = batch_size
+        self._index_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+        self.trigram = True
+        self.last_search_time = None
+        self._init_db()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _init_db(self):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute('''
+                CREATE TABLE IF NOT EXISTS log_segments (
+                    segment TEXT PRIMARY KEY,
+                    task_name TEXT NOT NULL,
+                    path TEXT,
+                    offset INTEGER DEFAULT 0,
+                    complete INTEGER DEFAULT 0,
+                    file_key TEXT
+                )
+                ''')
+                conn.execute('''
+                CREATE TABLE IF NOT EXISTS log_lines (
+                    id INTEGER PRIMARY KEY,
+                    segment TEXT NOT NULL,
+                    task_name TEXT NOT NULL,
+                    level TEXT,
+                    created_at TEXT,
+                    message TEXT NOT NULL
+                )
+                ''')
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_log_lines_segment ON log_lines (segment)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_log_lines_task_time ON log_lines (task_name, created_at)")
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_log_lines_time ON log_lines (created_at)")
+                try:
+                    # trigram分词支持中文和任意子串检索（SQLite 3.34+）
+                    conn.execute(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5("
+                        "message, content='log_lines', content_rowid='id', tokenize='trigram')"
+                    )
+                except sqlite3.OperationalError:
+                    self.trigram = False
+                    conn.execute(
+                        "CREATE VIRTUAL TABLE IF NOT EXISTS log_fts USING fts5("
+                        "message, content='log_lines', content_rowid='id')"
+                    )
+                # 外部内容表通过触发器与log_lines保持同步
+                conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS log_lines_ai AFTER INSERT ON log_lines BEGIN
+                    INSERT INTO log_fts (rowid, message) VALUES (new.id, new.message);
+                END
+                ''')
+                conn.execute('''
+                CREATE TRIGGER IF NOT EXISTS log_lines_ad AFTER DELETE ON log_lines BEGIN
+                    INSERT INTO log_fts (log_fts, rowid, message) VALUES ('delete', old.id, old.message);
+                END
+                ''')
+            # 已存在的库以实际的分词器为准
+            sql = conn.execute("SELECT sql FROM sqlite_master WHERE name = 'log_fts'").fetchone()[0]
+            self.trigram = "trigram" in sql
+        finally:
+            conn.close()
+
+    def start(self):
+        """启动后台增量索引线程"""
+        if self.interval <= 0:
+            return
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._loop, name="log-index", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.index_all()
+            except Exception as e:
+                print(f"索引日志失败: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+
+    def _task_names(self):
+        try:
+            names = os.listdir(self.log_dir)
+        except OSError:
+            return []
+        return sorted(name[:-4] for name in names if name.endswith(".log"))
+
+    def index_all(self, wait=True):
+        """增量索引所有任务的日志，返回新增行数"""
+        count = 0
+        for task_name in self._task_names():
+            if self._stop_event.is_set():
+                break
+            count += self.index_task(task_name, wait)
+        return count
+
+    def index_task(self, task_name, wait=True):
+        """
+        增量索引单个任务的当前日志和轮转日志，返回新增行数
+
+        wait为False时如果后台线程正在索引则直接返回，不等待
+        """
+        if not self._index_lock.acquire(blocking=wait):
+            return 0
+        try:
+            conn = self._connect()
+            try:
+                return self._index_task(conn, task_name)
+            finally:
+                conn.close()
+        finally:
+            self._index_lock.release()
+
+    def _index_task(self, conn, task_name):
+        count = 0
+        seen = set()
+        # 按从旧到新的顺序处理，包括按时间轮转和压缩后的文件
+        for path in list_log_files(self.log_dir, task_name):
+            try:
+                st = os.stat(path)
+                file_key = f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+                # 轮转文件未变化时不需要重新读取首行
+                row = conn.execute(
+                    "SELECT segment FROM log_segments WHERE task_name = ? AND file_key = ? AND complete = 1",
+                    (task_name, file_key)
+                ).fetchone()
+                if row:
+                    seen.add(row[0])
+                    continue
+                with open_log_file(path) as f:
+                    first_line = f.readline()
+                    if not first_line.endswith(b"\n"):
+                        continue
+                    segment = f"{task_name}:{hashlib.sha1(first_line).hexdigest()}"
+                    seen.add(segment)
+                    row = conn.execute(
+                        "SELECT offset, complete FROM log_segments WHERE segment = ?", (segment,)
+                    ).fetchone()
+                    offset = row[0] if row else 0
+                    if row is None:
+                        with conn:
+                            conn.execute(
+                                "INSERT INTO log_segments (segment, task_name, path) VALUES (?, ?, ?)",
+                                (segment, task_name, path)
+                            )
+                    complete = not path.endswith(".log")
+                    if not (row and row[1]):
+                        count += self._index_file(conn, f, task_name, segment, offset)
+                    with conn:
+                        conn.execute(
+                            "UPDATE log_segments SET path = ?, complete = ?, file_key = ? WHERE segment = ?",
+                            (path, 1 if complete else 0, file_key if complete else None, segment)
+                        )
+            except (OSError, EOFError) as e:
+                print(f"读取日志文件失败: {path}, {e}")
+        # 删除已被清空或轮转删除的分段
+        stale = [
+            row[0] for row in conn.execute("SELECT segment FROM log_segments WHERE task_name = ?", (task_name,))
+            if row[0] not in seen
+        ]
+        for segment in stale:
+            with conn:
+                conn.execute("DELETE FROM log_lines WHERE segment = ?", (segment,))
+                conn.execute("DELETE FROM log_segments WHERE segment = ?", (segment,))
+        return count
+
+    def _index_file(self, conn, f, task_name, segment, offset):
+        """从offset开始分批读取完整的行写入索引，每批一个事务并同时更新偏移"""
+        count = 0
+        f.seek(offset)
+        level = None
+        created_at = None
+        rows = []
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                # 未写完的行留到下次索引
+                break
+            offset += len(raw)
+            try:
+                line = raw.decode("utf-8").rstrip("\r\n")
+            except UnicodeDecodeError:
+                line = raw.decode("gbk", errors="replace").rstrip("\r\n")
+            if not line:
+                continue
+            match = self.LINE_PATTERN.match(line)
+            record = self._parse_json(line) if match is None else None
+            if match:
+                created_at, level, message = match.groups()
+            elif record:
+                created_at, level, message = record.get("time"), record.get("level"), record.get("message", "")
+                if record.get("exc_info"):
+                    message = f"{message}\n{record['exc_info']}"
+            else:
+                # 异常堆栈等多行日志沿用上一行的时间和级别
+                message = line
+            rows.append((segment, task_name, level, created_at, message))
+            if len(rows) >= self.batch_size:
+                self._insert(conn, rows, segment, offset)
+                count += len(rows)
+                rows = []
+                if self._stop_event.is_set():
+                    return count
+        self._insert(conn, rows, segment, offset)
+        return count + len(rows)
+
+    @staticmethod
+    def _parse_json(line):
+        """解析JSON格式的日志行，不是JSON时返回None"""
+        if not line.startswith("{"):
+            return None
+        try:
+            record = json.loads(line)
+        except ValueError:
+            return None
+        return record if isinstance(record, dict) else None
+
+    def _insert(self, conn, rows, segment, offset):
+        with conn:
+            if rows:
+                conn.executemany(
+                    "INSERT INTO log_lines (segment, task_name, level, created_at, message) VALUES (?, ?, ?, ?, ?)",
+                    rows
+                )
+            conn.execute("UPDATE log_segments SET offset = ? WHERE segment = ?", (offset, segment))
+
+    def search(self, query, task_name=None, level=None, since=None, until=None, limit=200):
+        """
+        检索日志
+
+        Args:
+            query: 检索文本，按子串匹配；为空时只按其他条件过滤
+            task_name: 只检索指定任务
+            level: 只检索指定级别，如ERROR
+            since: 起始时间，格式 YYYY-mm-dd HH:MM:SS
+            until: 结束时间
+            limit: 最多返回的条数
+
+        Returns:
+            按时间倒序的结果列表，每项为 {"task_name", "level", "created_at", "message"}
+        """
+        conditions = []
+        args = []
+        query = (query or "").strip()
+        if query and (self.trigram and len(query) >= 3 or not self.trigram):
+            conditions.append("l.id IN (SELECT rowid FROM log_fts WHERE log_fts MATCH ?)")
+            args.append('"' + query.replace('"', '""') + '"')
+        elif query:
+            # trigram无法匹配少于3个字符的文本，退化为LIKE扫描
+            conditions.append("l.message LIKE ? ESCAPE '\\'")
+            args.append("%" + query.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%")
+        if task_name:
+            conditions.append("l.task_name = ?")
+            args.append(task_name)
+        if level:
+            conditions.append("l.level = ?")
+            args.append(level)
+        if since:
+            conditions.append("l.created_at >= ?")
+            args.append(since)
+        if until:
+            conditions.append("l.created_at <= ?")
+            args.append(until)
+        sql = "SELECT l.task_name, l.level, l.created_at, l.message FROM log_lines l"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY l.created_at DESC, l.id DESC LIMIT ?"
+        args.append(limit)
+
+        start = time.perf_counter()
+        conn = self._connect()
+        try:
+            rows = conn.execute(sql, args).fetchall()
+        finally:
+            conn.close()
+        self.last_search_time = time.perf_counter() - start
+        return [
+            {"task_name": row[0], "level": row[1], "created_at": row[2], "message": row[3]}
+            for row in rows
+        ]
@@ -0,0 +1,230 @@
+"""
+运行指标及Prometheus文本格式导出
+
+各模块直接使用本模块中定义的计数器和直方图记录指标，
+设置环境变量METRICS_PORT后，CrawlerManager会在本机启动HTTP服务，
+通过 http://127.0.0.1:<端口>/metrics 以Prometheus文本格式输出全部指标。
+"""
+import math
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """只增不减的计数器"""
+    type_name = "counter"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels, amount=1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def get(self, *labels):
+        return self._values.get(labels, 0)
+
+    def collect(self):
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}" for labels, value in items]
+
+
+class Gauge(Counter):
+    """可增可减的当前值，也可以设置为在导出时调用的函数"""
+    type_name = "gauge"
+
+    def __init__(self, name, help_text, labelnames=(), function=None):
+        super().__init__(name, help_text, labelnames)
+        self.function = function
+
+    def set(self, *labels, value):
+        with self._lock:
+            self._values[labels] = value
+
+    def collect(self):
+        if self.function is not None:
+            try:
+                values = self.function()
+            except Exception as e:
+                print(f"采集指标失败: {self.name}, {e}")
+                return []
+            # 函数返回单个数值，或 {标签值元组: 数值}
+            if not isinstance(values, dict):
+                values = {(): values}
+            with self._lock:
+                self._values = dict(values)
+        return super().collect()
+
+
+class Histogram:
+    """按上界分桶统计观测值的分布"""
+    type_name = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=(0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10)):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # 标签值元组 -> [各桶计数, 总和, 总数]
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, *labels, value):
+        with self._lock:
+            entry = self._values.get(labels)
+            if entry is None:
+                entry = self._values[labels] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    entry[0][i] += 1
+                    break
+            entry[1] += value
+            entry[2] += 1
+
+    def collect(self):
+        with self._lock:
+            items = sorted((labels, (list(entry[0]), entry[1], entry[2])) for labels, entry in self._values.items())
+        lines = []
+        for labels, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                le = f'le="{_format_value(float(bound))}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """指标注册表，按注册顺序导出"""
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric):
+        with self._lock:
+            # 重复注册时返回已有的指标，模块重新加载时不会丢失数据
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, help_text, labelnames=()):
+        return self.register(Counter(name, help_text, labelnames))
+
+    def gauge(self, name, help_text, labelnames=(), function=None):
+        return self.register(Gauge(name, help_text, labelnames, function))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=None):
+        if buckets is None:
+            return self.register(Histogram(name, help_text, labelnames))
+        return self.register(Histogram(name, help_text, labelnames, buckets))
+
+    def render(self):
+        """生成Prometheus文本格式"""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            lines.extend(metric.collect())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+RUNS_STARTED = REGISTRY.counter("crawlytools_runs_started_total", "开始执行的运行次数", ["task"])
+RUNS_FINISHED = REGISTRY.counter("crawlytools_runs_finished_total", "结束的运行次数，按结果分类", ["task", "result"])
+RUN_DURATION = REGISTRY.histogram(
+    "crawlytools_run_duration_seconds", "运行耗时（秒）", ["task"],
+    buckets=(1, 5, 15, 30, 60, 300, 900, 1800, 3600, 7200)
+)
+QUEUE_WAIT = REGISTRY.histogram(
+    "crawlytools_queue_wait_seconds", "运行在队列中的等待时间（秒）",
+    buckets=(0.01, 0.1, 0.5, 1, 5, 15, 60, 300, 900)
+)
+SCHEDULER_MISFIRES = REGISTRY.counter("crawlytools_scheduler_misfires_total", "错过触发时间的定时任务次数", ["task"])
+DB_WRITE_SECONDS = REGISTRY.histogram(
+    "crawlytools_db_write_seconds", "数据库写事务耗时（秒）",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 5)
+)
+DB_ROWS_WRITTEN = REGISTRY.counter("crawlytools_db_rows_written_total", "写入数据库的语句数")
+DB_ROWS_FAILED = REGISTRY.counter("crawlytools_db_rows_failed_total", "重试后仍写入失败、被丢弃的语句数")
+# 当前值由CrawlerManager在导出时提供
+RUNS_ACTIVE = REGISTRY.gauge("crawlytools_runs_active", "运行中的爬虫数")
+RUNS_QUEUED = REGISTRY.gauge("crawlytools_runs_queued", "排队等待执行的运行数")
+CRAWLERS_LOADED = REGISTRY.gauge("crawlytools_crawlers_loaded", "已加载的爬虫数")
+LOG_BYTES_WRITTEN = REGISTRY.counter("crawlytools_log_bytes_written_total", "写入日志文件的字节数（队列写入模式）", ["task"])
+
+
+class MetricsServer:
+    """在后台线程中提供 /metrics 的本地HTTP服务"""
+    def __init__(self, registry=None, host=None, port=None):
+        """
+        Args:
+            registry: 指标注册表，默认为REGISTRY
+            host: 监听地址，None时读取环境变量METRICS_HOST（默认127.0.0.1）
+            port: 监听端口，None时读取环境变量METRICS_PORT，0表示随机端口
+        """
+        self.registry = registry or REGISTRY
+        self.host = host or os.environ.get("METRICS_HOST", "127.0.0.1")
+        self.port = int(port if port is not None else os.environ.get("METRICS_PORT", 0))
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        registry = self.registry
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # 不在控制台输出每次抓取的访问日志
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics-server", daemon=True)
+        self._thread.start()
+        print(f"指标服务已启动: http://{self.host}:{self.port}/metrics")
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
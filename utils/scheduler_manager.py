@@ -1,8 +1,9 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 from apscheduler.triggers.cron import CronTrigger
-from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
 from core.db_manager import DBManager
 from core.crawler_manager import CrawlerManager
+from utils import metrics
 import time
 import logging
 import threading
@@ -20,7 +21,7 @@ class SchedulerManager:
         self.lock = threading.Lock()
         
         # 添加事件监听器
-        self.scheduler.add_listener(self.job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR)
+        self.scheduler.add_listener(self.job_listener, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
         
         # 调度器初始化完成，任务将在start()方法中加载
         print("调度器初始化完成")
@@ -189,7 +190,10 @@ class SchedulerManager:
     
     def job_listener(self, event):
         """任务执行事件监听器"""
-        if event.exception:
+        if event.code == EVENT_JOB_MISSED:
+            metrics.SCHEDULER_MISFIRES.inc(event.job_id)
+            logger.warning(f"定时任务 {event.job_id} 错过了计划运行时间 {event.scheduled_run_time}")
+        elif event.exception:
             logger.error(f"定时任务 {event.job_id} 执行出错: {event.exception}")
         else:
             logger.info(f"定时任务 {event.job_id} 执行成功")
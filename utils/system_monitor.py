@@ -1,16 +1,213 @@
+import os
+import threading
 import psutil
 import time
+from array import array
+
+class MetricSeries:
+    """
+    定长环形时间序列
+    
+    数值保存在预分配的array中，按step秒聚合为一个点（取平均值），
+    超过capacity个点后覆盖最早的点，内存占用与运行时长无关。
+    """
+    def __init__(self, step, capacity):
+        self.step = step
+        self.capacity = capacity
+        self.times = array('d', bytes(8 * capacity))
+        self.values = array('d', bytes(8 * capacity))
+        self.start = 0
+        self.count = 0
+        # 当前未结束的聚合区间
+        self._bucket = None
+        self._sum = 0.0
+        self._samples = 0
+    
+    def add(self, timestamp, value):
+        bucket = int(timestamp // self.step)
+        if self._bucket is not None and bucket != self._bucket:
+            self._push(self._bucket * self.step, self._sum / self._samples)
+            self._sum = 0.0
+            self._samples = 0
+        self._bucket = bucket
+        self._sum += value
+        self._samples += 1
+    
+    def _push(self, timestamp, value):
+        if self.count < self.capacity:
+            index = (self.start + self.count) % self.capacity
+            self.count += 1
+        else:
+            index = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.times[index] = timestamp
+        self.values[index] = value
+    
+    def get(self, limit=None):
+        """按时间顺序返回 (时间列表, 数值列表)，包括尚未结束的最新区间"""
+        indexes = [(self.start + i) % self.capacity for i in range(self.count)]
+        times = [self.times[i] for i in indexes]
+        values = [self.values[i] for i in indexes]
+        if self._samples:
+            times.append(float(self._bucket * self.step))
+            values.append(self._sum / self._samples)
+        if limit is not None:
+            times, values = times[-limit:], values[-limit:]
+        return times, values
+
+class MetricsHistory:
+    """系统指标历史，每个指标按1秒、1分钟、1小时三个精度分别保存"""
+    # (聚合间隔秒数, 点数)：1秒×10分钟，1分钟×24小时，1小时×30天
+    TIERS = ((1, 600), (60, 1440), (3600, 720))
+    METRICS = ("cpu", "memory", "disk_read", "disk_write", "net_sent", "net_recv", "active_crawlers")
+    
+    def __init__(self, tiers=None):
+        self.tiers = tiers or self.TIERS
+        self._series = {
+            metric: [MetricSeries(step, capacity) for step, capacity in self.tiers]
+            for metric in self.METRICS
+        }
+        self._lock = threading.Lock()
+    
+    def add_sample(self, timestamp, values):
+        """记录一次采样，values为 {指标名: 数值}"""
+        with self._lock:
+            for metric, value in values.items():
+                series = self._series.get(metric)
+                if series is None or value is None:
+                    continue
+                for tier in series:
+                    tier.add(timestamp, value)
+    
+    def get_series(self, metric, tier=0, limit=None):
+        """获取指标在指定精度下的 (时间列表, 数值列表)"""
+        with self._lock:
+            return self._series[metric][tier].get(limit)
 
 class SystemMonitor:
-    def __init__(self):
+    """
+    系统资源监控
+    
+    start()后由后台线程按固定间隔采样并保存最新快照，
+    界面读取get_system_info/get_system_info_string时直接返回快照，不会阻塞。
+    """
+    def __init__(self, interval=None, disk_interval=30, active_provider=None):
+        """
+        Args:
+            interval: 采样间隔（秒），None时读取环境变量MONITOR_INTERVAL（默认1秒）
+            disk_interval: 磁盘使用情况的采样间隔（秒），磁盘容量变化很慢
+            active_provider: 返回当前运行中爬虫数量的函数
+        """
+        self.interval = float(interval if interval is not None else os.environ.get("MONITOR_INTERVAL", 1))
+        self.disk_interval = disk_interval
         self.last_cpu_percent = None
+        self._disk = None
+        self._disk_time = 0
+        self._snapshot = None
+        self.active_provider = active_provider
+        self.history = MetricsHistory()
+        # 上一次的磁盘和网络I/O累计值，用于计算速率
+        self._last_io = None
+        self._stop_event = threading.Event()
+        self._thread = None
+        # 第一次调用cpu_percent(interval=None)返回0.0，先建立基准
+        psutil.cpu_percent(interval=None)
+    
+    def start(self):
+        """启动后台采样线程"""
+        if self._thread is None or not self._thread.is_alive():
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._loop, name="system-monitor", daemon=True)
+            self._thread.start()
+    
+    def stop(self, timeout=None):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+    
+    def _loop(self):
+        while not self._stop_event.is_set():
+            try:
+                self.sample()
+            except Exception as e:
+                print(f"采样系统资源失败: {e}")
+            if self._stop_event.wait(self.interval):
+                return
+    
+    def sample(self):
+        """采集一次系统资源信息并更新快照"""
+        cpu = self.get_cpu_usage()
+        mem_used, mem_total, mem_percent = self.get_memory_usage()
+        now = time.time()
+        if self._disk is None or now - self._disk_time >= self.disk_interval:
+            self._disk = self.get_disk_usage()
+            self._disk_time = now
+        disk_used, disk_total, disk_percent = self._disk
+        io_rates = self._get_io_rates(now)
+        active = None
+        if self.active_provider is not None:
+            try:
+                active = self.active_provider()
+            except Exception:
+                active = None
+        self.history.add_sample(now, dict(io_rates, cpu=cpu, memory=mem_percent, active_crawlers=active))
         
+        # 整体替换快照，读取方不需要加锁
+        self._snapshot = {
+            'cpu': round(cpu, 1),
+            'memory': {
+                'used': round(mem_used, 1),
+                'total': round(mem_total, 1),
+                'percent': round(mem_percent, 1)
+            },
+            'disk': {
+                'used': round(disk_used, 1),
+                'total': round(disk_total, 1),
+                'percent': round(disk_percent, 1)
+            },
+            'io': {name: round(rate, 1) for name, rate in io_rates.items()},
+            'active_crawlers': active,
+            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(now))
+        }
+        return self._snapshot
+    
+    def _get_io_rates(self, now):
+        """计算自上次采样以来的磁盘和网络I/O速率（字节/秒）"""
+        counters = {}
+        try:
+            disk = psutil.disk_io_counters()
+            if disk is not None:
+                counters["disk_read"] = disk.read_bytes
+                counters["disk_write"] = disk.write_bytes
+        except (OSError, RuntimeError):
+            pass
+        try:
+            net = psutil.net_io_counters()
+            counters["net_sent"] = net.bytes_sent
+            counters["net_recv"] = net.bytes_recv
+        except (OSError, RuntimeError):
+            pass
+        last = self._last_io
+        self._last_io = (now, counters)
+        if last is None or now <= last[0]:
+            return {}
+        elapsed = now - last[0]
+        return {
+            name: max(0, value - last[1][name]) / elapsed
+            for name, value in counters.items() if name in last[1]
+        }
+    
+    def set_active_provider(self, provider):
+        """设置返回运行中爬虫数量的函数"""
+        self.active_provider = provider
+    
     def get_cpu_usage(self):
         """
         获取CPU使用率（百分比）
         """
-        # 第一次调用返回0.0，第二次调用返回真实值
-        cpu_percent = psutil.cpu_percent(interval=0.1)
+        # 不阻塞，返回距上次调用以来的CPU使用率
+        cpu_percent = psutil.cpu_percent(interval=None)
+        self.last_cpu_percent = cpu_percent
         return cpu_percent
     
     def get_memory_usage(self):
@@ -37,30 +234,118 @@ class SystemMonitor:
     
     def get_system_info(self):
         """
-        获取完整的系统资源信息
+        获取完整的系统资源信息，后台采样运行时直接返回最新快照
         """
-        cpu = self.get_cpu_usage()
-        mem_used, mem_total, mem_percent = self.get_memory_usage()
-        disk_used, disk_total, disk_percent = self.get_disk_usage()
-        
-        return {
-            'cpu': round(cpu, 1),
-            'memory': {
-                'used': round(mem_used, 1),
-                'total': round(mem_total, 1),
-                'percent': round(mem_percent, 1)
-            },
-            'disk': {
-                'used': round(disk_used, 1),
-                'total': round(disk_total, 1),
-                'percent': round(disk_percent, 1)
-            },
-            'timestamp': time.strftime('%Y-%m-%d %H:%M:%S')
-        }
+        snapshot = self._snapshot
+        if snapshot is None:
+            snapshot = self.sample()
+        return snapshot
     
     def get_system_info_string(self):
         """
         获取格式化的系统资源信息字符串
         """
         info = self.get_system_info()
-        return f"CPU: {info['cpu']}% | 内存: {info['memory']['used']}/{info['memory']['total']}MB ({info['memory']['percent']}%) | 磁盘: {info['disk']['used']}/{info['disk']['total']}GB ({info['disk']['percent']}%)"
\ No newline at end of file
+        return f"CPU: {info['cpu']}% | 内存: {info['memory']['used']}/{info['memory']['total']}MB ({info['memory']['percent']}%) | 磁盘: {info['disk']['used']}/{info['disk']['total']}GB ({info['disk']['percent']}%)"
+
+
+class ProcessResourceTracker:
+    """
+    单次运行的进程资源统计
+    
+    后台线程定期采样指定进程及其所有子进程，累计CPU时间和读写字节数，
+    记录内存、文件句柄数和线程数的峰值。已退出的子进程保留最后一次采样的值，
+    因此最后一次采样之后的消耗不计入统计。
+    """
+    def __init__(self, pid, interval=1.0):
+        self.pid = pid
+        self.interval = interval
+        # (pid, 创建时间) -> 最近一次采样的累计值，防止pid复用
+        self._processes = {}
+        self.rss = 0
+        self.peak_rss = 0
+        self.num_fds = 0
+        self.max_fds = 0
+        self.num_threads = 0
+        self.max_threads = 0
+        self._lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+    
+    def start(self):
+        """立即采样一次并启动后台采样线程"""
+        self.sample()
+        self._thread = threading.Thread(target=self._loop, name=f"resource-{self.pid}", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self):
+        """停止采样并返回统计结果"""
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        return self.get_stats()
+    
+    def _loop(self):
+        # 开始阶段加密采样（0.1、0.2、0.4秒……），短时间运行的任务也能统计到
+        delay = min(0.1, self.interval)
+        while not self._stop_event.wait(delay):
+            self.sample()
+            delay = min(delay * 2, self.interval)
+    
+    def sample(self):
+        """采样一次进程树的资源占用，进程已退出时不做任何更新"""
+        try:
+            root = psutil.Process(self.pid)
+            processes = [root] + root.children(recursive=True)
+        except (psutil.NoSuchProcess, psutil.AccessDenied):
+            return
+        rss = num_fds = num_threads = 0
+        with self._lock:
+            for process in processes:
+                try:
+                    with process.oneshot():
+                        key = (process.pid, process.create_time())
+                        cpu = process.cpu_times()
+                        entry = self._processes.setdefault(key, {"cpu": 0.0, "read": 0, "write": 0})
+                        entry["cpu"] = cpu.user + cpu.system
+                        try:
+                            io = process.io_counters()
+                            entry["read"] = io.read_bytes
+                            entry["write"] = io.write_bytes
+                        except (AttributeError, psutil.AccessDenied):
+                            # 部分平台不支持进程级I/O统计
+                            pass
+                        rss += process.memory_info().rss
+                        num_fds += process.num_fds() if hasattr(process, "num_fds") else process.num_handles()
+                        num_threads += process.num_threads()
+                except (psutil.NoSuchProcess, psutil.AccessDenied, psutil.ZombieProcess):
+                    continue
+            self.rss = rss
+            self.peak_rss = max(self.peak_rss, rss)
+            self.num_fds = num_fds
+            self.max_fds = max(self.max_fds, num_fds)
+            self.num_threads = num_threads
+            self.max_threads = max(self.max_threads, num_threads)
+    
+    def get_stats(self):
+        """
+        获取统计结果
+        
+        Returns:
+            cpu_seconds（CPU秒数）、rss/peak_rss（字节）、read_bytes/write_bytes、
+            num_fds/max_fds、num_threads/max_threads
+        """
+        with self._lock:
+            entries = list(self._processes.values())
+            return {
+                "cpu_seconds": round(sum(entry["cpu"] for entry in entries), 3),
+                "rss": self.rss,
+                "peak_rss": self.peak_rss,
+                "read_bytes": sum(entry["read"] for entry in entries),
+                "write_bytes": sum(entry["write"] for entry in entries),
+                "num_fds": self.num_fds,
+                "max_fds": self.max_fds,
+                "num_threads": self.num_threads,
+                "max_threads": self.max_threads,
+            }
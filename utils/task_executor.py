@@ -0,0 +1,102 @@
+import os
+import threading
+from concurrent.futures import Future
+from core.worker_pool import WorkerPool
+
+class TaskExecutor:
+    """
+    界面辅助任务的共享后台执行器
+    
+    读取日志、加载和保存定时任务等操作都提交到同一个有界WorkerPool，不再每次创建新线程。
+    指定key提交的请求会合并：同一key只保留最新的一个排队请求，被替换的请求直接取消；
+    同一key的请求依次执行，旧请求的结果不会在新请求之后才返回界面。
+    """
+    def __init__(self, max_workers=None, name="gui"):
+        """
+        Args:
+            max_workers: 工作线程数，None时读取环境变量GUI_WORKERS（默认4）
+            name: 工作线程名前缀
+        """
+        self.max_workers = int(max_workers or os.environ.get("GUI_WORKERS", 4))
+        self.name = name
+        self._pool = None
+        self._lock = threading.Lock()
+        # key -> 最新的排队请求 (future, fn, args, kwargs)
+        self._pending = {}
+        # 正在执行的key
+        self._running = set()
+    
+    def _get_pool(self):
+        # 首次提交时才创建工作线程
+        with self._lock:
+            if self._pool is None:
+                self._pool = WorkerPool(self.max_workers, name=self.name)
+            return self._pool
+    
+    def submit(self, fn, *args, key=None, **kwargs):
+        """
+        提交任务，返回concurrent.futures.Future
+        
+        Args:
+            key: 合并请求的键，None表示不合并
+        """
+        if key is None:
+            return self._get_pool().submit(self._call, fn, *args, **kwargs)
+        future = Future()
+        with self._lock:
+            previous = self._pending.get(key)
+            self._pending[key] = (future, fn, args, kwargs)
+            # 已有排队请求或同key正在执行时不重复调度，执行结束后再取最新的请求
+            schedule = previous is None and key not in self._running
+        if previous is not None:
+            previous[0].cancel()
+        if schedule:
+            self._get_pool().submit(self._run_key, key)
+        return future
+    
+    @staticmethod
+    def _call(fn, *args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        except Exception as e:
+            print(f"后台任务执行失败: {getattr(fn, '__name__', fn)}, {e}")
+            raise
+    
+    def _run_key(self, key):
+        with self._lock:
+            entry = self._pending.pop(key, None)
+            if entry is None:
+                return
+            self._running.add(key)
+        future, fn, args, kwargs = entry
+        try:
+            if future.set_running_or_notify_cancel():
+                try:
+                    future.set_result(self._call(fn, *args, **kwargs))
+                except BaseException as e:
+                    future.set_exception(e)
+        finally:
+            with self._lock:
+                self._running.discard(key)
+                reschedule = key in self._pending
+            if reschedule:
+                self._get_pool().submit(self._run_key, key)
+    
+    def get_stats(self):
+        """工作线程池状态及合并中的请求数"""
+        with self._lock:
+            pending = len(self._pending)
+            pool = self._pool
+        stats = pool.get_stats() if pool is not None else {"max_workers": self.max_workers, "active": 0, "queued": 0}
+        stats["coalescing"] = pending
+        return stats
+    
+    def shutdown(self, wait=False):
+        with self._lock:
+            pool = self._pool
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future, _, _, _ in pending:
+            future.cancel()
+        if pool is not None:
+            pool.shutdown(wait=wait)
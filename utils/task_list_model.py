@@ -0,0 +1,106 @@
+class TaskListModel:
+    """
+    任务列表数据模型
+    
+    保存每个任务各列的显示文本，按名称/状态过滤和按列排序后得到可见行顺序，
+    虚拟列表控件只按行号读取可见行，绘制开销只与屏幕上的行数有关。
+    不依赖wxPython。
+    """
+    # 状态所在的列
+    STATUS_COLUMN = 1
+    
+    def __init__(self, column_count, numeric_columns=()):
+        """
+        Args:
+            column_count: 列数，第0列为任务名
+            numeric_columns: 按数值排序的列，"-"等无法解析的值排在最前
+        """
+        self.column_count = column_count
+        self.numeric_columns = set(numeric_columns)
+        # 任务名 -> 各列文本
+        self.rows = {}
+        # 过滤和排序后的可见任务名及其行号
+        self.order = []
+        self.positions = {}
+        self.sort_column = 0
+        self.sort_ascending = True
+        self.filter_text = ""
+        self.status_filter = None
+    
+    def __len__(self):
+        return len(self.order)
+    
+    def set_rows(self, rows):
+        """整体替换所有行，rows为 {任务名: 各列文本}"""
+        self.rows = {task_name: list(values) for task_name, values in rows.items()}
+        self.apply()
+    
+    def update(self, task_name, values):
+        """
+        更新或新增一行
+        
+        Returns:
+            (变化的列集合, 是否需要重新排序或过滤)。行不存在时视为所有列变化；
+            变化涉及排序列或过滤条件时需要调用apply()重新计算可见行。
+        """
+        old_values = self.rows.get(task_name)
+        values = list(values)
+        self.rows[task_name] = values
+        if old_values is None:
+            return set(range(self.column_count)), True
+        changed = {column for column, value in enumerate(values) if old_values[column] != value}
+        reorder = self.sort_column in changed or (self.status_filter is not None and self.STATUS_COLUMN in changed)
+        return changed, reorder
+    
+    def remove(self, task_name):
+        return self.rows.pop(task_name, None) is not None
+    
+    def set_filter(self, text=None, status=None):
+        """按任务名子串（不区分大小写）和状态过滤，空值表示不过滤"""
+        self.filter_text = (text or "").strip().lower()
+        self.status_filter = status or None
+        self.apply()
+    
+    def sort(self, column, ascending=None):
+        """按列排序，ascending为None时点击同一列切换升降序"""
+        if ascending is None:
+            ascending = not self.sort_ascending if column == self.sort_column else True
+        self.sort_column = column
+        self.sort_ascending = ascending
+        self.apply()
+    
+    def _sort_key(self, task_name):
+        value = self.rows[task_name][self.sort_column]
+        if self.sort_column in self.numeric_columns:
+            try:
+                # "读/写"等组合列按第一个数值排序
+                return (1, float(value.split("/")[0]), task_name)
+            except ValueError:
+                return (0, 0.0, task_name)
+        return (value, task_name)
+    
+    def apply(self):
+        """重新计算过滤和排序后的可见行"""
+        names = self.rows.keys()
+        if self.filter_text:
+            names = [name for name in names if self.filter_text in name.lower()]
+        if self.status_filter is not None:
+            names = [name for name in names if self.rows[name][self.STATUS_COLUMN] == self.status_filter]
+        self.order = sorted(names, key=self._sort_key, reverse=not self.sort_ascending)
+        self.positions = {name: index for index, name in enumerate(self.order)}
+    
+    def task_at(self, index):
+        """可见行号对应的任务名，越界时返回None"""
+        if 0 <= index < len(self.order):
+            return self.order[index]
+        return None
+    
+    def index_of(self, task_name):
+        """任务的可见行号，被过滤或不存在时返回-1"""
+        return self.positions.get(task_name, -1)
+    
+    def get_text(self, index, column):
+        task_name = self.task_at(index)
+        if task_name is None:
+            return ""
+        return self.rows[task_name][column]
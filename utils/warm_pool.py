@@ -0,0 +1,340 @@
+"""
+脚本爬虫的预热解释器（forkserver方式，仅POSIX）
+
+每次用 subprocess 启动脚本都要重新初始化解释器并导入 requests、lxml 等依赖，
+短脚本的大部分时间花在这里。WarmPool 启动一个常驻的模板进程，预先导入
+WARM_POOL_PRELOAD 中的模块，之后每次运行由模板进程 fork 出新进程，用 runpy
+按脚本方式执行（设置 argv、工作目录、环境变量和 sys.path[0]）。
+每次运行都是模板的全新副本，执行完即退出，运行之间不共享任何状态。
+
+模板进程只使用标准库，本文件同时是模板进程的入口:
+    python utils/warm_pool.py --fd <控制套接字> --preload requests,lxml
+管理进程中的输出写入logging，模板进程和脚本进程中没有日志配置，直接输出到stderr。
+"""
+import json
+import logging
+import os
+import signal
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# 等待模板进程返回脚本进程号的最长时间（秒），包含首次运行时的模块预加载
+SPAWN_TIMEOUT = 60
+
+
+class WarmProcess:
+    """模板进程fork出的脚本进程，提供CrawlerWrapper用到的subprocess.Popen接口"""
+    def __init__(self, args, conn, stdout_fd, stderr_fd):
+        self.args = args
+        self.returncode = None
+        self.pid = None
+        self._conn = conn
+        self._buffer = b""
+        self.stdout = open(stdout_fd, "r", encoding="utf-8", errors="replace")
+        self.stderr = open(stderr_fd, "r", encoding="utf-8", errors="replace")
+    
+    def _read_message(self, timeout=None):
+        """读取一行 "类型 值" 消息，超时抛出socket.timeout，连接断开抛出ConnectionError"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._buffer:
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise socket.timeout()
+                self._conn.settimeout(remaining)
+            else:
+                self._conn.settimeout(None)
+            data = self._conn.recv(4096)
+            if not data:
+                raise ConnectionError("预热进程连接已断开")
+            self._buffer += data
+        line, _, self._buffer = self._buffer.partition(b"\n")
+        kind, _, value = line.decode("utf-8").partition(" ")
+        return kind, value
+    
+    def _start(self, request):
+        self._conn.sendall(json.dumps(request).encode("utf-8") + b"\n")
+        kind, value = self._read_message(SPAWN_TIMEOUT)
+        if kind != "pid":
+            raise RuntimeError(f"预热进程启动脚本失败: {value}")
+        self.pid = int(value)
+    
+    def wait(self, timeout=None):
+        if self.returncode is None:
+            try:
+                kind, value = self._read_message(timeout)
+            except socket.timeout:
+                raise subprocess.TimeoutExpired(self.args, timeout)
+            except (ConnectionError, OSError) as e:
+                logger.warning("读取预热进程退出码失败: %s", e)
+                kind, value = "exit", "1"
+            self.returncode = int(value) if kind == "exit" else 1
+            self._conn.close()
+        return self.returncode
+    
+    def poll(self):
+        if self.returncode is None:
+            try:
+                return self.wait(0)
+            except subprocess.TimeoutExpired:
+                return None
+        return self.returncode
+    
+    def send_signal(self, signum):
+        if self.returncode is None and self.pid is not None:
+            try:
+                os.kill(self.pid, signum)
+            except ProcessLookupError:
+                pass
+    
+    def terminate(self):
+        self.send_signal(signal.SIGTERM)
+    
+    def kill(self):
+        self.send_signal(signal.SIGKILL)
+
+
+class WarmPool:
+    """
+    管理模板进程并通过它启动脚本
+    
+    模板进程在第一次收到请求前完成模块预加载，start()本身不等待；
+    模板进程退出后下一次spawn会重新启动它。
+    """
+    def __init__(self, preload=None):
+        """
+        Args:
+            preload: 预加载的模块名列表，None时读取环境变量WARM_POOL_PRELOAD（逗号分隔）
+        """
+        if preload is None:
+            preload = os.environ.get("WARM_POOL_PRELOAD", "")
+        if isinstance(preload, str):
+            preload = preload.split(",")
+        self.preload = [name.strip() for name in preload if name.strip()]
+        self._process = None
+        self._sock = None
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def supported():
+        """需要fork和通过Unix套接字传递文件描述符，Windows下不可用"""
+        return hasattr(os, "fork") and hasattr(socket, "send_fds")
+    
+    def start(self):
+        with self._lock:
+            self._start()
+        return self
+    
+    def _start(self):
+        parent, child = socket.socketpair()
+        try:
+            self._process = subprocess.Popen(
+                [sys.executable, os.path.abspath(__file__), "--fd", str(child.fileno()),
+                 "--preload", ",".join(self.preload)],
+                pass_fds=(child.fileno(),),
+                stdin=subprocess.DEVNULL,
+            )
+        except Exception:
+            parent.close()
+            raise
+        finally:
+            child.close()
+        self._sock = parent
+        logger.info("预热解释器已启动，进程号 %s，预加载模块: %s", self._process.pid, ", ".join(self.preload) or "无")
+    
+    def spawn(self, argv, env=None, cwd=None):
+        """
+        从模板进程fork执行脚本
+        
+        Args:
+            argv: 脚本路径及参数（不含解释器）
+        Returns:
+            WarmProcess；请求无法发送到模板进程时返回None，由调用方改用subprocess启动
+        """
+        conn, remote = socket.socketpair()
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        try:
+            with self._lock:
+                if self._process is None or self._process.poll() is not None:
+                    if self._process is not None:
+                        logger.warning("预热解释器已退出，返回码: %s，重新启动", self._process.returncode)
+                        self._sock.close()
+                    self._start()
+                socket.send_fds(self._sock, [b"R"], [remote.fileno(), stdout_w, stderr_w])
+        except Exception as e:
+            logger.error("提交到预热解释器失败，改用subprocess启动: %s", e)
+            conn.close()
+            os.close(stdout_r)
+            os.close(stderr_r)
+            return None
+        finally:
+            # 写端已交给脚本进程，本进程保留会导致读取线程收不到EOF
+            remote.close()
+            os.close(stdout_w)
+            os.close(stderr_w)
+        process = WarmProcess([sys.executable] + list(argv), conn, stdout_r, stderr_r)
+        try:
+            process._start({
+                "argv": list(argv),
+                "cwd": cwd or os.getcwd(),
+                "env": dict(os.environ if env is None else env),
+            })
+        except Exception:
+            # 请求已经发出，不能再回退到subprocess，否则脚本可能执行两次
+            conn.close()
+            process.stdout.close()
+            process.stderr.close()
+            raise
+        return process
+    
+    def stop(self):
+        """关闭控制套接字，模板进程读到EOF后退出；正在执行的脚本不受影响"""
+        with self._lock:
+            process, self._process = self._process, None
+            if self._sock is not None:
+                self._sock.close()
+                self._sock = None
+        if process is not None:
+            try:
+                process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+
+# ---- 以下在模板进程及其fork出的进程中执行 ----
+
+def _run_script(request, stdout_fd, stderr_fd):
+    """在fork出的进程中按 python script.py 的方式执行脚本，不返回"""
+    import atexit
+    import io
+    import runpy
+    import traceback
+
+    code = 1
+    try:
+        devnull = os.open(os.devnull, os.O_RDONLY)
+        os.dup2(devnull, 0)
+        os.dup2(stdout_fd, 1)
+        os.dup2(stderr_fd, 2)
+        for fd in (devnull, stdout_fd, stderr_fd):
+            os.close(fd)
+        encoding = request["env"].get("PYTHONIOENCODING", "utf-8").split(":")[0] or "utf-8"
+        sys.stdin = io.TextIOWrapper(io.FileIO(0, "r", closefd=False), encoding=encoding)
+        sys.stdout = io.TextIOWrapper(io.FileIO(1, "w", closefd=False), encoding=encoding,
+                                      line_buffering=True, write_through=True)
+        sys.stderr = io.TextIOWrapper(io.FileIO(2, "w", closefd=False), encoding=encoding,
+                                      errors="backslashreplace", line_buffering=True, write_through=True)
+        signal.signal(signal.SIGINT, signal.default_int_handler)
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+
+        script = os.path.abspath(request["argv"][0])
+        os.chdir(request["cwd"])
+        os.environ.clear()
+        os.environ.update(request["env"])
+        sys.argv = [script] + request["argv"][1:]
+        sys.path[0] = os.path.dirname(script)
+
+        code = 0
+        try:
+            runpy.run_path(script, run_name="__main__")
+        except SystemExit as e:
+            if e.code is None:
+                code = 0
+            elif isinstance(e.code, int):
+                code = e.code
+            else:
+                print(e.code, file=sys.stderr)
+                code = 1
+        except BaseException:
+            traceback.print_exc()
+            code = 1
+        # 与解释器正常退出一致：等待非守护线程并执行atexit
+        for thread in threading.enumerate():
+            if thread is not threading.main_thread() and not thread.daemon:
+                thread.join()
+        atexit._run_exitfuncs()
+    except BaseException:
+        traceback.print_exc()
+    finally:
+        try:
+            sys.stdout.flush()
+            sys.stderr.flush()
+        finally:
+            os._exit(code & 0xFF)
+
+
+def _handle_request(conn, stdout_fd, stderr_fd):
+    """模板fork出的中间进程：读取请求，再fork执行脚本并回报进程号和退出码，不返回"""
+    try:
+        signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = conn.recv(65536)
+            if not chunk:
+                os._exit(0)
+            data += chunk
+        request = json.loads(data)
+        pid = os.fork()
+        if pid == 0:
+            conn.close()
+            _run_script(request, stdout_fd, stderr_fd)
+        os.close(stdout_fd)
+        os.close(stderr_fd)
+        conn.sendall(f"pid {pid}\n".encode("utf-8"))
+        _, status = os.waitpid(pid, 0)
+        conn.sendall(f"exit {os.waitstatus_to_exitcode(status)}\n".encode("utf-8"))
+    except BaseException as e:
+        try:
+            conn.sendall(f"error {e}\n".encode("utf-8"))
+        except OSError:
+            pass
+    os._exit(0)
+
+
+def serve(control_fd, preload):
+    """模板进程主循环：预加载模块后，每收到一个请求fork一个中间进程处理"""
+    # Ctrl+C由管理进程处理，模板进程在控制套接字关闭后退出
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    # 中间进程自行回收，不留僵尸进程
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    for name in preload:
+        try:
+            __import__(name)
+        except Exception as e:
+            print(f"预加载模块失败: {name}, {e}", file=sys.stderr)
+    sock = socket.socket(fileno=control_fd)
+    while True:
+        try:
+            # 每条请求为1字节，附带 连接、stdout写端、stderr写端 三个描述符
+            msg, fds, _, _ = socket.recv_fds(sock, 1, 3)
+        except InterruptedError:
+            continue
+        if not msg:
+            break
+        if len(fds) != 3:
+            for fd in fds:
+                os.close(fd)
+            continue
+        conn_fd, stdout_fd, stderr_fd = fds
+        pid = os.fork()
+        if pid == 0:
+            sock.close()
+            _handle_request(socket.socket(fileno=conn_fd), stdout_fd, stderr_fd)
+        for fd in fds:
+            os.close(fd)
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--fd", type=int, required=True)
+    parser.add_argument("--preload", default="")
+    args = parser.parse_args()
+    serve(args.fd, [name for name in args.preload.split(",") if name])